@@ -15,19 +15,38 @@ if not GOOGLE_API_KEY:
     )
 
 # Rate limiting settings
-REQUEST_DELAY_MIN = 0.5  # Minimum delay between requests (seconds)
-REQUEST_DELAY_MAX = 1.5  # Maximum delay between requests (seconds)
 MAX_REQUESTS_PER_MINUTE = 100  # Conservative limit
+MAX_RETRIES = 5  # Retries for connection errors and 429/5xx responses
+RETRY_JITTER = 0.3  # Max random seconds added to each retry backoff so workers don't retry in lockstep
 
 # Search configuration
 DEFAULT_RADIUS = 5000  # 5km radius for searches
 MAX_RESULTS_PER_LOCATION = 60  # Google Places limit is 60 results per search
 MAX_RESULTS_LARGE_CITY = 180  # Allow up to 3x for large cities with multiple search points
+SEARCH_WORKERS = 8  # Concurrent Text Search requests per query
+SEARCH_POINT_SKIP_COUNT = 15  # Skip an extra large-city search point once this many results lie near it
+SEARCH_POINT_COVER_RADIUS = 0.7  # ...within this fraction of the search radius
+DETAIL_WORKERS = 8  # Concurrent Place Details requests per location
+LOCATION_WORKERS = 4  # Postal codes processed concurrently by scrape_postal_codes
+GEOCODE_WORKERS = 8  # Area names geocoded concurrently by geocode_area_names
+NOMINATIM_MIN_INTERVAL = 1.0  # Seconds between Nominatim requests (their usage policy)
+PROGRESS_PRINT_INTERVAL = 0.1  # Minimum seconds between ProgressTracker lines
 
 # File output settings
 OUTPUT_DIR = "output"
 CSV_FILENAME = "leads.csv"
 XLSX_FILENAME = "leads.xlsx"
+GEOCODE_CACHE_FILENAME = "geocode_cache.sqlite"  # Persistent geocoding cache
+CSV_CHUNK_SIZE = 50_000  # Rows read per chunk when scanning existing output
+
+# Column dtypes used when reading the CSV back (low-cardinality text as category)
+READ_DTYPES = {
+    'place_id': str,
+    'phone': str,
+    'primary_type': 'category',
+    'business_status': 'category',
+    'all_types': 'string'
+}
 
 # Data fields to extract
 PLACE_FIELDS = [
@@ -69,4 +88,4 @@ POSTAL_CODE_PATTERNS = {
 
 # Logging configuration
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
-LOG_LEVEL = 'INFO' 
\ No newline at end of file
+LOG_LEVEL = 'INFO' 
@@ -0,0 +1,7 @@
+import os
+
+# config refuses to import without a key; unit tests never reach the API
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key')
+
+# test_scraper.py is a manual smoke test against the live API
+collect_ignore = ['test_scraper.py']
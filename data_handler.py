@@ -1,11 +1,38 @@
-import pandas as pd
+from __future__ import annotations
+
+import csv
 import os
 import logging
-from typing import List, Dict, Set
-import hashlib
+from typing import TYPE_CHECKING, Callable, List, Dict, Set, Tuple
+import re
+import threading
+from collections import Counter
 from pathlib import Path
 import config
 
+# pandas is imported inside the methods that need it to keep startup fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Legal suffixes stripped from business names before fuzzy comparison
+_SUFFIX_RE = re.compile(r'\b(?:inc|ltd|llc|corp)\b\.?', re.IGNORECASE)
+_WS_RE = re.compile(r'\s+')
+# Punctuation ignored when comparing names/addresses ("Joe's" == "Joes")
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Column order used for the CSV and XLSX outputs
+CSV_COLUMNS = [
+    'name', 'address', 'phone', 'website', 'rating', 'review_count',
+    'business_status', 'primary_type', 'all_types', 'opening_hours',
+    'latitude', 'longitude', 'place_id', 'search_query', 
+    'search_location', 'scraped_at'
+]
+
+def _as_dict(business) -> Dict:
+    """Row mapping for the CSV writer; accepts plain dicts and BusinessRecord tuples."""
+    return business._asdict() if hasattr(business, '_asdict') else business
+
 class DataHandler:
     def __init__(self, output_dir: str = None):
         """Initialize the data handler."""
@@ -16,9 +43,23 @@ class DataHandler:
         self.xlsx_path = self.output_dir / config.XLSX_FILENAME
         
         # Track seen businesses for deduplication
-        self.seen_hashes: Set[str] = set()
+        self.seen_keys: Set[Tuple[str, str, str]] = set()
         self.seen_place_ids: Set[str] = set()
         
+        # place_ids claimed by scraping workers but not saved yet; the lock
+        # guards both place_id sets since workers and the saver run concurrently
+        self._reserved_place_ids: Set[str] = set()
+        self._lock = threading.Lock()
+        
+        # Records saved this session, kept so the XLSX can be built without
+        # re-reading the CSV when there was no earlier data on disk
+        self._pending: List[Dict] = []
+        self._existing_records = 0
+        
+        # Long-lived CSV handle, opened on first save
+        self._csv_file = None
+        self._csv_writer = None
+        
         # Initialize logger
         self.logger = logging.getLogger(__name__)
         
@@ -28,90 +69,144 @@ class DataHandler:
     def _load_existing_data(self):
         """Load existing data to continue where we left off."""
         if self.csv_path.exists():
+            import pandas as pd
+            
             try:
-                df = pd.read_csv(self.csv_path)
-                # Rebuild deduplication sets
-                for _, row in df.iterrows():
-                    if pd.notna(row.get('place_id')):
-                        self.seen_place_ids.add(row['place_id'])
+                total = 0
+                chunks = pd.read_csv(
+                    self.csv_path,
+                    usecols=lambda col: col in ('place_id', 'name', 'address', 'phone'),
+                    dtype=str,
+                    chunksize=config.CSV_CHUNK_SIZE
+                )
+                # Rebuild deduplication sets one chunk at a time
+                for chunk in chunks:
+                    total += len(chunk)
+                    if 'place_id' in chunk.columns:
+                        self.seen_place_ids.update(chunk['place_id'].dropna().tolist())
                     
-                    # Create hash for fuzzy deduplication
-                    business_hash = self._create_business_hash(row.to_dict())
-                    if business_hash:
-                        self.seen_hashes.add(business_hash)
+                    # Create keys for fuzzy deduplication in one vectorized pass
+                    self.seen_keys.update(self._business_keys(chunk))
                 
-                self.logger.info(f"Loaded {len(df)} existing records from {self.csv_path}")
+                self._existing_records = total
+                self.logger.info(f"Loaded {total} existing records from {self.csv_path}")
             except Exception as e:
                 self.logger.error(f"Error loading existing data: {e}")
     
-    def _create_business_hash(self, business: Dict) -> str:
-        """Create a hash for fuzzy deduplication based on name and address."""
-        try:
-            # Normalize data for comparison
-            name = str(business.get('name', '')).lower().strip()
-            address = str(business.get('address', '')).lower().strip()
-            phone = str(business.get('phone', '')).strip()
-            
-            # Remove common variations
-            name = name.replace('inc.', '').replace('inc', '').replace('ltd.', '').replace('ltd', '')
-            name = name.replace('llc', '').replace('corp.', '').replace('corp', '').strip()
-            
-            # Create hash from normalized data
-            hash_string = f"{name}|{address}|{phone}"
-            return hashlib.md5(hash_string.encode()).hexdigest()
-        except Exception:
-            return None
+    def _business_keys(self, df: pd.DataFrame) -> List[Tuple[str, str, str]]:
+        """Build normalized (name, address, phone) keys for a whole frame."""
+        import pandas as pd
+        
+        def column(col: str) -> pd.Series:
+            if col not in df.columns:
+                return pd.Series('', index=df.index)
+            return df[col].fillna('').astype(str)
+        
+        def squash(values: pd.Series) -> pd.Series:
+            values = values.str.replace(_PUNCT_RE, '', regex=True)
+            return values.str.replace(_WS_RE, ' ', regex=True).str.strip()
+        
+        names = squash(column('name').str.lower().str.replace(_SUFFIX_RE, '', regex=True))
+        addresses = squash(column('address').str.lower())
+        phones = column('phone').str.replace(_NON_DIGIT_RE, '', regex=True)
+        return list(zip(names.tolist(), addresses.tolist(), phones.tolist()))
     
-    def _validate_business_data(self, business: Dict) -> bool:
-        """Validate business data quality."""
+    @staticmethod
+    def _present(df: pd.DataFrame, col: str) -> pd.Series:
+        """Mask of rows where a column holds a non-empty value."""
+        import pandas as pd
+        
+        if col not in df.columns:
+            return pd.Series(False, index=df.index)
+        return df[col].notna() & df[col].astype(str).ne('')
+    
+    def _validation_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Validate business data quality for a whole frame at once."""
         # Must have name
-        if not business.get('name'):
-            return False
+        valid = self._present(df, 'name')
         
         # Must have some contact info (address, phone, or website)
-        if not any([
-            business.get('address'),
-            business.get('phone'),
-            business.get('website')
-        ]):
-            return False
+        valid &= (
+            self._present(df, 'address') |
+            self._present(df, 'phone') |
+            self._present(df, 'website')
+        )
         
         # Filter out obviously invalid data
-        name = business.get('name', '').lower()
-        if any(keyword in name for keyword in ['test', 'example', 'placeholder']):
-            return False
+        if 'name' in df.columns:
+            names = df['name'].fillna('').astype(str).str.lower()
+            valid &= ~names.str.contains('test|example|placeholder', regex=True)
+        
+        return valid
+    
+    def reserve_place_id(self, place_id: str) -> bool:
+        """Claim a place_id for processing; False if it was already seen or claimed.
         
-        return True
+        Safe to call from worker threads, so duplicates can be skipped before
+        spending a Place Details request on them.
+        """
+        with self._lock:
+            if place_id in self.seen_place_ids or place_id in self._reserved_place_ids:
+                return False
+            self._reserved_place_ids.add(place_id)
+            return True
+    
+    def release_place_ids(self, place_ids) -> None:
+        """Drop claims for place_ids that were not extracted, so a later location can retry them."""
+        with self._lock:
+            self._reserved_place_ids.difference_update(place_ids)
     
     def deduplicate_businesses(self, businesses: List[Dict]) -> List[Dict]:
         """Remove duplicate businesses from the list."""
-        unique_businesses = []
+        if not businesses:
+            return []
         
-        for business in businesses:
-            # Skip if validation fails
-            if not self._validate_business_data(business):
-                self.logger.debug(f"Skipping invalid business: {business.get('name')}")
-                continue
-            
-            # Check place_id first (exact match)
-            place_id = business.get('place_id')
-            if place_id and place_id in self.seen_place_ids:
-                self.logger.debug(f"Skipping duplicate place_id: {place_id}")
+        with self._lock:
+            return self._deduplicate_locked(businesses)
+    
+    def _deduplicate_locked(self, businesses: List[Dict]) -> List[Dict]:
+        """Deduplicate a batch; caller must hold ``self._lock``."""
+        import pandas as pd
+        
+        df = pd.DataFrame(businesses)
+        
+        # Skip rows that fail validation
+        valid = self._validation_mask(df)
+        
+        # Check place_id first (exact match against previously saved data)
+        if 'place_id' in df.columns:
+            place_ids = df['place_id'].where(self._present(df, 'place_id'))
+        else:
+            place_ids = pd.Series(None, index=df.index, dtype=object)
+        # Per-row set lookups; isin() would copy the whole seen set into an array on every save
+        candidates = valid & ~place_ids.map(self.seen_place_ids.__contains__).astype(bool)
+        
+        # Compute fuzzy keys for the remaining rows only, in one vectorized pass
+        positions = candidates.to_numpy().nonzero()[0]
+        keys = self._business_keys(df.iloc[positions])
+        place_id_list = place_ids.tolist()
+        
+        # Resolve duplicates within the batch, keeping the first occurrence
+        unique_businesses = []
+        for i, business_key in zip(positions, keys):
+            place_id = place_id_list[i]
+            if pd.notna(place_id) and place_id in self.seen_place_ids:
                 continue
-            
-            # Check fuzzy hash
-            business_hash = self._create_business_hash(business)
-            if business_hash and business_hash in self.seen_hashes:
-                self.logger.debug(f"Skipping fuzzy duplicate: {business.get('name')}")
+            if business_key in self.seen_keys:
+                self.logger.debug(f"Skipping fuzzy duplicate: {df['name'].iat[i]}")
                 continue
             
             # Add to unique list and tracking sets
-            unique_businesses.append(business)
-            if place_id:
+            unique_businesses.append(businesses[i])
+            if pd.notna(place_id):
                 self.seen_place_ids.add(place_id)
-            if business_hash:
-                self.seen_hashes.add(business_hash)
+                self._reserved_place_ids.discard(place_id)
+            self.seen_keys.add(business_key)
         
+        self.logger.debug(
+            f"Skipped {int((~valid).sum())} invalid and "
+            f"{int((valid & ~candidates).sum())} duplicate place_id records"
+        )
         self.logger.info(f"Deduplicated {len(businesses)} -> {len(unique_businesses)} businesses")
         return unique_businesses
     
@@ -121,40 +216,65 @@ class DataHandler:
             return
         
         try:
-            df = pd.DataFrame(businesses)
+            if mode != 'a' or self._csv_writer is None:
+                self._open_csv(mode)
             
-            # Reorder columns for better readability
-            column_order = [
-                'name', 'address', 'phone', 'website', 'rating', 'review_count',
-                'business_status', 'primary_type', 'all_types', 'opening_hours',
-                'latitude', 'longitude', 'place_id', 'search_query', 
-                'search_location', 'scraped_at'
-            ]
-            
-            # Only include columns that exist
-            available_columns = [col for col in column_order if col in df.columns]
-            df = df[available_columns]
-            
-            # Save with header only if file doesn't exist
-            header = not self.csv_path.exists() if mode == 'a' else True
-            
-            df.to_csv(self.csv_path, mode=mode, header=header, index=False, encoding='utf-8')
+            self._csv_writer.writerows(map(_as_dict, businesses))
+            self._csv_file.flush()
             
             self.logger.info(f"Saved {len(businesses)} businesses to CSV")
             
         except Exception as e:
             self.logger.error(f"Error saving to CSV: {e}")
     
+    def _open_csv(self, mode: str):
+        """Open the CSV for buffered writing and prepare the row writer."""
+        self.close()
+        
+        # Keep appending in the column layout of an existing file
+        fieldnames = CSV_COLUMNS
+        if mode == 'a' and self.csv_path.exists() and self.csv_path.stat().st_size:
+            with open(self.csv_path, newline='', encoding='utf-8') as f:
+                fieldnames = next(csv.reader(f))
+            header = False
+        else:
+            header = True
+        
+        self._csv_file = open(self.csv_path, mode, newline='', encoding='utf-8', buffering=1 << 20)
+        self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=fieldnames, extrasaction='ignore')
+        if header:
+            self._csv_writer.writeheader()
+    
+    def close(self):
+        """Close the CSV handle if one is open."""
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv_writer = None
+    
+    @staticmethod
+    def _ordered_frame(businesses: List[Dict]) -> pd.DataFrame:
+        """Build a DataFrame with the output columns in readable order."""
+        import pandas as pd
+        
+        df = pd.DataFrame(businesses)
+        
+        # Only include columns that exist
+        available_columns = [col for col in CSV_COLUMNS if col in df.columns]
+        return df[available_columns]
+    
     def save_to_xlsx(self, businesses: List[Dict] = None):
         """Save all businesses to XLSX file with formatting."""
+        import pandas as pd
+        
         try:
             # Load all data from CSV if no specific businesses provided
             if businesses is None:
                 if not self.csv_path.exists():
                     return
-                df = pd.read_csv(self.csv_path)
+                df = pd.read_csv(self.csv_path, dtype=config.READ_DTYPES)
             else:
-                df = pd.DataFrame(businesses)
+                df = self._ordered_frame(businesses)
             
             if df.empty:
                 return
@@ -180,12 +300,11 @@ class DataHandler:
                 for col_num, value in enumerate(df.columns.values):
                     worksheet.write(0, col_num, value, header_format)
                 
-                # Auto-adjust column widths
+                # Auto-adjust column widths (widths settle well within the first rows)
+                sample = df.head(10_000).astype('string')
+                widths = sample.apply(lambda s: s.str.len().max()).fillna(0).astype(int)
                 for i, col in enumerate(df.columns):
-                    max_length = max(
-                        df[col].astype(str).map(len).max(),
-                        len(col)
-                    )
+                    max_length = max(widths.iat[i], len(col))
                     worksheet.set_column(i, i, min(max_length + 2, 50))
                 
                 # Add filters
@@ -211,16 +330,34 @@ class DataHandler:
         # Save to CSV (append mode for continuous saving)
         self.save_to_csv(unique_businesses, mode='a' if continuous else 'w')
         
-        # Update XLSX with all data
+        # Continuous runs build the XLSX once in finalize() instead of per batch
         if continuous:
-            self.save_to_xlsx()  # Rebuild from CSV
+            self._pending.extend(unique_businesses)
         else:
+            self._pending = []
+            self._existing_records = len(unique_businesses)
             self.save_to_xlsx(unique_businesses)
         
         self.logger.info(f"Successfully saved {len(unique_businesses)} new businesses")
     
+    def finalize(self):
+        """Write the XLSX export from all saved data once the run is over."""
+        # Nothing new this session: the existing workbook is already current
+        if not self._pending and (not self._existing_records or self.xlsx_path.exists()):
+            return
+        
+        if self._existing_records:
+            self.save_to_xlsx()  # Rebuild from CSV
+        elif self._pending:
+            self.save_to_xlsx(self._pending)
+        
+        self._existing_records += len(self._pending)
+        self._pending = []
+    
     def get_statistics(self) -> Dict:
         """Get statistics about collected data."""
+        import pandas as pd
+        
         stats = {
             'total_records': 0,
             'unique_places': 0,
@@ -234,34 +371,66 @@ class DataHandler:
         
         try:
             if self.csv_path.exists():
-                df = pd.read_csv(self.csv_path)
-                stats['total_records'] = len(df)
-                stats['unique_places'] = df['place_id'].nunique()
-                stats['unique_names'] = df['name'].nunique()
-                stats['has_phone'] = df['phone'].notna().sum()
-                stats['has_website'] = df['website'].notna().sum()
-                stats['has_rating'] = df['rating'].notna().sum()
+                place_ids = set()
+                names = set()
+                rating_sum = 0.0
+                business_types = Counter()
+                
+                chunks = pd.read_csv(
+                    self.csv_path,
+                    usecols=lambda col: col in (
+                        'place_id', 'name', 'phone', 'website', 'rating', 'primary_type'
+                    ),
+                    dtype=config.READ_DTYPES,
+                    chunksize=config.CSV_CHUNK_SIZE
+                )
+                for chunk in chunks:
+                    # Non-null counts for every column in one pass
+                    counts = chunk.count()
+                    stats['total_records'] += len(chunk)
+                    stats['has_phone'] += int(counts.get('phone', 0))
+                    stats['has_website'] += int(counts.get('website', 0))
+                    stats['has_rating'] += int(counts.get('rating', 0))
+                    if 'rating' in chunk.columns:
+                        rating_sum += float(chunk['rating'].sum())
+                    
+                    # Collapse repeats within the chunk before touching the sets
+                    if 'place_id' in chunk.columns:
+                        place_ids.update(chunk['place_id'].dropna().unique())
+                    if 'name' in chunk.columns:
+                        names.update(chunk['name'].dropna().unique())
+                    
+                    # Business types distribution
+                    if 'primary_type' in chunk.columns:
+                        business_types.update(chunk['primary_type'].value_counts().to_dict())
+                
+                stats['unique_places'] = len(place_ids)
+                stats['unique_names'] = len(names)
                 
                 if stats['has_rating'] > 0:
-                    stats['avg_rating'] = df['rating'].mean()
+                    stats['avg_rating'] = rating_sum / stats['has_rating']
                 
-                # Business types distribution
-                if 'primary_type' in df.columns:
-                    stats['business_types'] = df['primary_type'].value_counts().to_dict()
+                stats['business_types'] = dict(business_types.most_common())
         
         except Exception as e:
             self.logger.error(f"Error calculating statistics: {e}")
         
         return stats
     
-    def export_filtered_data(self, filter_func, filename: str):
-        """Export filtered subset of data."""
+    def export_filtered_data(self, mask_fn: Callable[[pd.DataFrame], pd.Series], filename: str):
+        """Export filtered subset of data.
+        
+        ``mask_fn`` receives the whole DataFrame and returns a boolean mask,
+        e.g. ``lambda df: (df['rating'] >= 4.0) & df['phone'].notna()``.
+        """
+        import pandas as pd
+        
         try:
             if not self.csv_path.exists():
                 return
             
-            df = pd.read_csv(self.csv_path)
-            filtered_df = df[df.apply(filter_func, axis=1)]
+            df = pd.read_csv(self.csv_path, dtype=config.READ_DTYPES)
+            filtered_df = df[mask_fn(df)]
             
             export_path = self.output_dir / filename
             filtered_df.to_csv(export_path, index=False)
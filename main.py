@@ -10,8 +10,8 @@ import os
 import sys
 from typing import List
 import signal
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 
 from places_scraper import PlacesScraper
 from data_handler import DataHandler
@@ -19,16 +19,15 @@ from utils import (
     generate_postal_codes, 
     validate_query_template, 
     ProgressTracker,
-    format_business_summary,
-    batch_list
+    format_business_summary
 )
 import config
 
 class LeadScraper:
-    def __init__(self, api_key: str = None, output_dir: str = None, max_workers: int = 1):
+    def __init__(self, api_key: str = None, output_dir: str = None, max_workers: int = 3):
         """Initialize the lead scraper."""
-        self.scraper = PlacesScraper(api_key)
         self.data_handler = DataHandler(output_dir)
+        self.scraper = PlacesScraper(api_key, self.data_handler.output_dir / config.GEOCODE_CACHE_FILENAME)
         self.max_workers = max_workers
         self.running = True
         
@@ -58,6 +57,9 @@ class LeadScraper:
         if not self.running:
             return []
         
+        # place_ids claimed by this location; released again unless they were extracted
+        reserved = set()
+        
         try:
             # Geocode postal code
             coordinates = self.scraper.geocode_postal_code(postal_code)
@@ -67,57 +69,68 @@ class LeadScraper:
             
             # Format query
             query = query_template.format(postal_code)
-            self.scraper.current_query = query
-            self.scraper.current_location = postal_code
             
             # Search places
             places = self.scraper.search_places(query, coordinates)
             
-            # Extract business data
-            businesses = []
+            # Skip places another location already found, before fetching details
+            new_places = []
             for place in places:
-                if not self.running:
-                    break
-                try:
-                    business_data = self.scraper.extract_business_data(place, detailed)
-                    businesses.append(business_data)
-                except Exception as e:
-                    self.logger.error(f"Error extracting data for place: {e}")
-                    continue
+                place_id = place.get('place_id')
+                if place_id:
+                    if not self.data_handler.reserve_place_id(place_id):
+                        continue
+                    reserved.add(place_id)
+                new_places.append(place)
+            
+            if not self.running:
+                self.data_handler.release_place_ids(reserved)
+                return []
+            
+            # Extract business data (detail lookups run concurrently)
+            businesses = self.scraper.extract_businesses(new_places, detailed, query, postal_code)
+            
+            # Places that failed extraction were dropped; let another location pick them up
+            reserved.difference_update(business.place_id for business in businesses)
+            self.data_handler.release_place_ids(reserved)
             
             return businesses
             
         except Exception as e:
             self.logger.error(f"Error processing {postal_code}: {e}")
+            self.data_handler.release_place_ids(reserved)
             return []
     
     def scrape_locations_parallel(self, query_template: str, postal_codes: List[str], 
                                 detailed: bool = True, batch_size: int = 10) -> None:
         """Scrape multiple locations using parallel processing."""
+        from tqdm import tqdm
+        
         self.logger.info(f"Starting parallel scraping of {len(postal_codes)} locations")
         
-        # Process in batches to manage memory and API limits
-        for batch in batch_list(postal_codes, batch_size):
-            if not self.running:
-                break
-            
-            batch_results = []
+        postal_iter = iter(postal_codes)
+        pending = {}
+        batch_results = []
+        completed = 0
+        
+        def submit(postal_code: str):
+            future = executor.submit(self.scrape_single_location, query_template, postal_code, detailed)
+            pending[future] = postal_code
+        
+        # One pool for the whole run; keep up to batch_size locations in flight and
+        # refill as each one finishes so a slow location never stalls the others
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for postal_code in islice(postal_iter, batch_size):
+                submit(postal_code)
             
-            # Use ThreadPoolExecutor for I/O bound tasks
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Submit tasks for current batch
-                future_to_postal = {
-                    executor.submit(self.scrape_single_location, query_template, postal_code, detailed): postal_code
-                    for postal_code in batch
-                }
-                
-                # Collect results with progress tracking
-                with tqdm(total=len(batch), desc=f"Processing batch") as pbar:
-                    for future in as_completed(future_to_postal):
-                        if not self.running:
-                            break
-                        
-                        postal_code = future_to_postal[future]
+            # Throttle redraws so the bar's lock is not taken on every completion
+            with tqdm(total=len(postal_codes), desc="Processing locations",
+                      miniters=max(1, len(postal_codes) // 50), mininterval=0.5) as pbar:
+                while pending and self.running:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    
+                    for future in done:
+                        postal_code = pending.pop(future)
                         try:
                             businesses = future.result()
                             if businesses:
@@ -126,12 +139,24 @@ class LeadScraper:
                         except Exception as e:
                             self.logger.error(f"Error processing {postal_code}: {e}")
                         
+                        completed += 1
                         pbar.update(1)
-            
-            # Save batch results immediately
-            if batch_results:
-                self.data_handler.save_businesses(batch_results, continuous=True)
-                self.logger.info(f"Saved {len(batch_results)} businesses from current batch")
+                        
+                        # Save every batch_size locations to avoid data loss
+                        if completed % batch_size == 0 and batch_results:
+                            self.data_handler.save_businesses(batch_results, continuous=True)
+                            self.logger.info(f"Saved {len(batch_results)} businesses from current batch")
+                            batch_results = []
+                        
+                        if self.running:
+                            next_code = next(postal_iter, None)
+                            if next_code is not None:
+                                submit(next_code)
+        
+        # Save whatever the last partial batch collected
+        if batch_results:
+            self.data_handler.save_businesses(batch_results, continuous=True)
+            self.logger.info(f"Saved {len(batch_results)} businesses from current batch")
     
     def scrape_locations_sequential(self, query_template: str, postal_codes: List[str], 
                                   detailed: bool = True) -> None:
@@ -193,10 +218,16 @@ class LeadScraper:
                 self.max_workers = max_workers
             
             # Start scraping
-            if parallel:
-                self.scrape_locations_parallel(query_template, postal_codes, detailed)
-            else:
-                self.scrape_locations_sequential(query_template, postal_codes, detailed)
+            try:
+                if parallel:
+                    self.scrape_locations_parallel(query_template, postal_codes, detailed)
+                else:
+                    self.scrape_locations_sequential(query_template, postal_codes, detailed)
+            finally:
+                # Build the XLSX once from everything saved so far
+                self.data_handler.finalize()
+                self.data_handler.close()
+                self.scraper.close()
             
             # Display final statistics
             self._display_final_stats()
@@ -1,20 +1,156 @@
 import googlemaps
-import time
+import requests
+import json
 import random
+import re
+import sys
+import time
 import logging
-from typing import List, Dict, Optional, Tuple
+import threading
+import numpy as np
+from collections import deque
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, NamedTuple, Optional, Tuple
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import config
+from utils import GeocodeCache, calculate_distances, wait_for_nominatim
+
+# orjson decodes Places responses several times faster; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Queries naming one of these get an expanded radius
+_LARGE_CITY_SET = frozenset([
+    'toronto', 'vancouver', 'montreal', 'calgary', 'ottawa', 'edmonton', 'winnipeg',
+    'new york', 'los angeles', 'chicago', 'london', 'manchester', 'birmingham'
+])
+_WORD_RE = re.compile(r'[a-z]+')
+_DOMAIN_RE = re.compile(r'https?://(?:www\.)?([^/]+)')
+
+# (dlat, dlng) offsets of the extra search points around a large city's centre,
+# spaced roughly 15-20km apart to avoid overlap
+_OFFSET_LARGE = 0.15  # ~15km
+_OFFSET_MEDIUM = 0.08  # ~8km
+_BIG_CITY_OFFSETS = (
+    # Cardinal directions - far out
+    (_OFFSET_LARGE, 0.0), (-_OFFSET_LARGE, 0.0), (0.0, _OFFSET_LARGE), (0.0, -_OFFSET_LARGE),
+    # Diagonal directions - medium distance (NE, SW, NW, SE)
+    (_OFFSET_MEDIUM, _OFFSET_MEDIUM), (-_OFFSET_MEDIUM, -_OFFSET_MEDIUM),
+    (_OFFSET_MEDIUM, -_OFFSET_MEDIUM), (-_OFFSET_MEDIUM, _OFFSET_MEDIUM),
+    # Additional ring for maximum coverage
+    (_OFFSET_LARGE * 1.5, 0.0), (-_OFFSET_LARGE * 1.5, 0.0),
+    (0.0, _OFFSET_LARGE * 1.5), (0.0, -_OFFSET_LARGE * 1.5),
+)
+
+# Only the Places fields the lead record actually keeps; billing and response size
+# both grow with the mask, and opening hours are limited to the human-readable text
+_PLACE_FIELDS = (
+    'id', 'displayName', 'formattedAddress', 'location', 'rating', 'userRatingCount',
+    'businessStatus', 'types', 'nationalPhoneNumber', 'internationalPhoneNumber',
+    'websiteUri', 'regularOpeningHours.weekdayDescriptions'
+)
+# Fields only Place Details requests; while this is empty a details call would return
+# exactly what Text Search already did, so detailed mode never makes one
+_DETAILS_ONLY_FIELDS = ()
+_SEARCH_FIELD_MASK = ','.join(f'places.{field}' for field in _PLACE_FIELDS)
+_DETAILS_FIELD_MASK = ','.join(_PLACE_FIELDS + _DETAILS_ONLY_FIELDS)
+
+# Shared default for missing nested objects; read-only, never mutated
+_EMPTY = {}
+
+class BusinessRecord(NamedTuple):
+    """One extracted business; a tuple keeps tens of thousands of rows compact."""
+    place_id: Optional[str]
+    name: Optional[str]
+    address: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+    website: Optional[str]
+    rating: Optional[float]
+    review_count: Optional[int]
+    business_status: Optional[str]
+    primary_type: str
+    all_types: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+    opening_hours: Optional[str]
+    search_query: str
+    search_location: str
+    scraped_at: str
+
+class _PacedRetry(Retry):
+    """urllib3 Retry that adds jitter to backoff and reports each retry attempt.
+    
+    ``on_retry`` runs after the backoff sleep, right before the request is resent,
+    so retries take a slot in the scraper's rate limiter like any other request.
+    """
+    
+    def __init__(self, *args, on_retry: Callable[[], None] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_retry = on_retry
+    
+    def new(self, **kwargs) -> 'Retry':
+        # urllib3 copies the Retry object on every attempt; carry the hook along
+        retry = super().new(**kwargs)
+        retry.on_retry = self.on_retry
+        return retry
+    
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, config.RETRY_JITTER) if backoff else backoff
+    
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.on_retry:
+            self.on_retry()
+
+def _needs_details(place: Dict) -> bool:
+    """True when a Place Details call could add fields the search result cannot have.
+    
+    Both masks share _PLACE_FIELDS, so an empty phone or website in the search
+    result would be just as empty in the details response.
+    """
+    return bool(_DETAILS_ONLY_FIELDS) and bool(place.get('place_id'))
+
+def _intern(value):
+    """Intern repeated low-cardinality strings so records share one copy."""
+    return sys.intern(value) if isinstance(value, str) else value
 
 class PlacesScraper:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, geocode_cache_path: str = None):
         """Initialize the Places API scraper."""
         self.api_key = api_key or config.GOOGLE_API_KEY
         self.gmaps = googlemaps.Client(key=self.api_key)
         self.geocoder = Nominatim(user_agent="lead_scraper_v1.0")
-        self.request_count = 0
-        self.start_time = time.time()
+        
+        # Postal code coordinates are stable, so remember them across runs
+        self.geocode_cache = GeocodeCache(geocode_cache_path) if geocode_cache_path else None
+        
+        # One keep-alive session for all Places API calls; the pool is sized for
+        # several worker threads sharing this scraper. Connection errors and
+        # 429/5xx responses are retried with jittered exponential backoff, honouring
+        # Retry-After, and each retry is counted by _rate_limit before it is sent.
+        retry = _PacedRetry(
+            total=config.MAX_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET', 'POST'],
+            raise_on_status=False,
+            on_retry=self._rate_limit
+        )
+        self.session = requests.Session()
+        self.session.headers.update({'X-Goog-Api-Key': self.api_key})
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry))
+        
+        # Timestamps of requests sent in the last 60 seconds (sliding window)
+        self._window = deque()
+        self._window_lock = threading.Lock()
         
         # Setup logging
         logging.basicConfig(
@@ -25,33 +161,42 @@ class PlacesScraper:
         
     def _rate_limit(self):
         """Implement rate limiting to avoid API quota exhaustion."""
-        self.request_count += 1
-        
-        # Check if we're approaching rate limits
-        elapsed_time = time.time() - self.start_time
-        if elapsed_time < 60:  # Within 1 minute
-            if self.request_count >= config.MAX_REQUESTS_PER_MINUTE:
-                sleep_time = 60 - elapsed_time
+        # Waiters hold the lock while sleeping so a freed slot goes to exactly one caller
+        with self._window_lock:
+            now = time.monotonic()
+            while self._window and self._window[0] <= now - 60:
+                self._window.popleft()
+            
+            if len(self._window) >= config.MAX_REQUESTS_PER_MINUTE:
+                sleep_time = self._window[0] + 60 - now
                 self.logger.info(f"Rate limit reached. Sleeping for {sleep_time:.1f} seconds")
                 time.sleep(sleep_time)
-                self.request_count = 0
-                self.start_time = time.time()
-        else:
-            # Reset counter after 1 minute
-            self.request_count = 1
-            self.start_time = time.time()
-        
-        # Random delay between requests
-        delay = random.uniform(config.REQUEST_DELAY_MIN, config.REQUEST_DELAY_MAX)
-        time.sleep(delay)
+                self._window.popleft()
+            
+            self._window.append(time.monotonic())
+    
+    def _request(self, send: Callable, url: str, **kwargs) -> requests.Response:
+        """Send a rate-limited request; transient failures are retried by the session adapter."""
+        self._rate_limit()
+        return send(url, **kwargs)
     
     def geocode_postal_code(self, postal_code: str) -> Optional[Tuple[float, float]]:
         """Convert postal code to latitude/longitude coordinates."""
+        if self.geocode_cache:
+            coordinates = self.geocode_cache.get(postal_code)
+            if coordinates:
+                return coordinates
+        
         try:
             self.logger.info(f"Geocoding postal code: {postal_code}")
+            # Nominatim allows one request per second across all of our threads
+            wait_for_nominatim()
             location = self.geocoder.geocode(postal_code)
             if location:
-                return (location.latitude, location.longitude)
+                coordinates = (location.latitude, location.longitude)
+                if self.geocode_cache:
+                    self.geocode_cache.set(postal_code, coordinates)
+                return coordinates
             else:
                 self.logger.warning(f"Could not geocode postal code: {postal_code}")
                 return None
@@ -59,13 +204,22 @@ class PlacesScraper:
             self.logger.error(f"Geocoding error for {postal_code}: {e}")
             return None
     
+    def close(self):
+        """Release the HTTP session and geocode cache."""
+        self.session.close()
+        if self.geocode_cache:
+            self.geocode_cache.close()
+    
     def search_places(self, query: str, location: Tuple[float, float], 
                      radius: int = None, is_large_city: bool = False) -> List[Dict]:
         """Search for places using Google Places API (New)."""
         radius = radius or config.DEFAULT_RADIUS
         
-        # For large cities/areas, use a larger radius and potentially multiple searches
-        if is_large_city or any(city in query.lower() for city in ['toronto', 'vancouver', 'montreal', 'calgary', 'ottawa', 'edmonton', 'winnipeg', 'new york', 'los angeles', 'chicago', 'london', 'manchester', 'birmingham']):
+        # For large cities/areas, use a larger radius and potentially multiple searches;
+        # match whole words (and word pairs for "new york") so "Londonderry" is not London
+        words = _WORD_RE.findall(query.lower())
+        query_terms = set(words).union(map(' '.join, zip(words, words[1:])))
+        if is_large_city or not _LARGE_CITY_SET.isdisjoint(query_terms):
             radius = max(radius, 25000)  # 25km for large cities
             self.logger.info(f"Large city detected, using expanded radius: {radius}m")
         
@@ -77,113 +231,129 @@ class PlacesScraper:
             if is_large_city and radius >= 25000:
                 # Add search points with larger spacing for better coverage
                 lat, lng = location
-                # Use larger offsets to avoid overlap (roughly 15-20km spacing)
-                offset_large = 0.15  # ~15km
-                offset_medium = 0.08  # ~8km
-                
-                additional_locations = [
-                    # Cardinal directions - far out
-                    (lat + offset_large, lng),        # North
-                    (lat - offset_large, lng),        # South  
-                    (lat, lng + offset_large),        # East
-                    (lat, lng - offset_large),        # West
-                    
-                    # Diagonal directions - medium distance
-                    (lat + offset_medium, lng + offset_medium),   # NE
-                    (lat - offset_medium, lng - offset_medium),   # SW
-                    (lat + offset_medium, lng - offset_medium),   # NW
-                    (lat - offset_medium, lng + offset_medium),   # SE
-                    
-                    # Additional ring for maximum coverage
-                    (lat + offset_large*1.5, lng),               # Far North
-                    (lat - offset_large*1.5, lng),               # Far South
-                    (lat, lng + offset_large*1.5),               # Far East
-                    (lat, lng - offset_large*1.5),               # Far West
-                ]
-                search_locations.extend(additional_locations)
+                search_locations.extend((lat + dlat, lng + dlng) for dlat, dlng in _BIG_CITY_OFFSETS)
                 self.logger.info(f"Using {len(search_locations)} search points with improved spacing for maximum coverage")
             
             seen_place_ids = set()
+            found_coords = []
+            max_results = getattr(config, 'MAX_RESULTS_LARGE_CITY', config.MAX_RESULTS_PER_LOCATION * 3)
+            self.logger.info(f"Searching: '{query}' near {location}")
             
-            for i, search_loc in enumerate(search_locations):
-                if i > 0:  # Add delay between multiple searches
-                    import time
-                    time.sleep(1)
+            def collect(i: int, places: List[Dict]) -> bool:
+                """Merge one search's results; True once enough places are collected."""
+                # Deduplicate by place_id
+                new_places = []
+                for place in places:
+                    place_id = place.get('id')
+                    if place_id and place_id not in seen_place_ids:
+                        seen_place_ids.add(place_id)
+                        converted = self._convert_new_api_format(place)
+                        new_places.append(converted)
+                        point = (converted.get('geometry') or _EMPTY).get('location') or _EMPTY
+                        if point.get('lat') is not None and point.get('lng') is not None:
+                            found_coords.append((point['lat'], point['lng']))
                 
-                self._rate_limit()
+                all_places.extend(new_places)
+                self.logger.info(f"Search {i+1}: Found {len(new_places)} new places (total: {len(all_places)})")
                 
-                if i == 0:
-                    self.logger.info(f"Searching: '{query}' near {search_loc}")
-                else:
-                    self.logger.info(f"Additional search {i+1}/{len(search_locations)} near {search_loc}")
-                
-                # Use the new Places API Text Search endpoint
-                url = "https://places.googleapis.com/v1/places:searchText"
-                
-                headers = {
-                    'Content-Type': 'application/json',
-                    'X-Goog-Api-Key': self.api_key,
-                    'X-Goog-FieldMask': 'places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.businessStatus,places.priceLevel,places.types,places.nationalPhoneNumber,places.internationalPhoneNumber,places.websiteUri,places.regularOpeningHours'
-                }
-                
-                data = {
-                    "textQuery": query,
-                    "locationBias": {
-                        "circle": {
-                            "center": {
-                                "latitude": search_loc[0],
-                                "longitude": search_loc[1]
-                            },
-                            "radius": radius  # Use full radius for each search point for maximum coverage
-                        }
-                    },
-                    "maxResultCount": config.MAX_RESULTS_PER_LOCATION,
-                    "languageCode": "en"
-                }
-                
-                import requests
-                response = requests.post(url, headers=headers, json=data)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    places = result.get('places', [])
-                    
-                    # Deduplicate by place_id
-                    new_places = []
-                    for place in places:
-                        place_id = place.get('id')
-                        if place_id and place_id not in seen_place_ids:
-                            seen_place_ids.add(place_id)
-                            converted_place = self._convert_new_api_format(place)
-                            new_places.append(converted_place)
-                    
-                    all_places.extend(new_places)
-                    self.logger.info(f"Search {i+1}: Found {len(new_places)} new places (total: {len(all_places)})")
+                # Stop if we have enough results
+                return len(all_places) >= max_results
+            
+            # Search the centre first; its results tell us which outer points are already covered
+            if collect(0, self._search_one(location, radius, query)) or len(search_locations) == 1:
+                self.logger.info(f"Total unique places found: {len(all_places)}")
+                return all_places
+            
+            extra_locations = [loc for loc in search_locations[1:]
+                               if not self._is_covered(loc, found_coords, radius)]
+            skipped = len(search_locations) - 1 - len(extra_locations)
+            if skipped:
+                self.logger.info(f"Skipping {skipped} search points already covered by earlier results")
+            
+            # Fan the remaining points out concurrently; _rate_limit still paces each request
+            if extra_locations:
+                with ThreadPoolExecutor(max_workers=min(config.SEARCH_WORKERS, len(extra_locations))) as executor:
+                    futures = [executor.submit(self._search_one, search_loc, radius, query)
+                               for search_loc in extra_locations]
                     
-                    # Stop if we have enough results
-                    max_results = getattr(config, 'MAX_RESULTS_LARGE_CITY', config.MAX_RESULTS_PER_LOCATION * 3)
-                    if len(all_places) >= max_results:
-                        break
+                    # Collect in submission order so results keep a stable order
+                    for i, future in enumerate(futures, 1):
+                        try:
+                            places = future.result()
+                        except Exception as e:
+                            self.logger.error(f"Search {i+1} near {extra_locations[i-1]} failed: {e}")
+                            continue
                         
-                else:
-                    self.logger.error(f"API request failed: {response.status_code} - {response.text}")
+                        if collect(i, places):
+                            for pending in futures[i:]:
+                                pending.cancel()
+                            break
             
             self.logger.info(f"Total unique places found: {len(all_places)}")
             return all_places
             
+        except requests.RequestException as e:
+            # Retries are exhausted; let the caller decide what a failed location means
+            self.logger.error(f"Error searching places: {e}")
+            raise
         except Exception as e:
             self.logger.error(f"Error searching places: {e}")
             return []
     
+    @staticmethod
+    def _is_covered(search_loc: Tuple[float, float], found_coords: List[Tuple[float, float]],
+                    radius: int) -> bool:
+        """True when enough collected places already lie near a search point."""
+        if len(found_coords) < config.SEARCH_POINT_SKIP_COUNT:
+            return False
+        
+        lat, lng = search_loc
+        reach_km = radius * config.SEARCH_POINT_COVER_RADIUS / 1000
+        points = np.asarray(found_coords)
+        distances = calculate_distances(lat, lng, points[:, 0], points[:, 1])
+        return int((distances <= reach_km).sum()) >= config.SEARCH_POINT_SKIP_COUNT
+    
+    def _search_one(self, search_loc: Tuple[float, float], radius: int, query: str) -> List[Dict]:
+        """Run a single Text Search request around one search point."""
+        # Use the new Places API Text Search endpoint
+        url = "https://places.googleapis.com/v1/places:searchText"
+        
+        headers = {
+            'X-Goog-FieldMask': _SEARCH_FIELD_MASK
+        }
+        
+        data = {
+            "textQuery": query,
+            "locationBias": {
+                "circle": {
+                    "center": {
+                        "latitude": search_loc[0],
+                        "longitude": search_loc[1]
+                    },
+                    "radius": radius  # Use full radius for each search point for maximum coverage
+                }
+            },
+            "maxResultCount": config.MAX_RESULTS_PER_LOCATION,
+            "languageCode": "en"
+        }
+        
+        response = self._request(self.session.post, url, headers=headers, json=data)
+        
+        if response.status_code != 200:
+            self.logger.error(f"API request failed: {response.status_code} - {response.text}")
+            return []
+        
+        return _json_loads(response.content).get('places', [])
+    
     def _convert_new_api_format(self, place: Dict) -> Dict:
         """Convert new Places API format to legacy format for compatibility."""
         try:
-            location = place.get('location', {})
-            opening_hours = place.get('regularOpeningHours', {})
+            location = place.get('location') or _EMPTY
+            opening_hours = place.get('regularOpeningHours') or _EMPTY
             
             return {
                 'place_id': place.get('id', ''),
-                'name': place.get('displayName', {}).get('text', ''),
+                'name': (place.get('displayName') or _EMPTY).get('text', ''),
                 'formatted_address': place.get('formattedAddress', ''),
                 'vicinity': place.get('formattedAddress', ''),
                 'geometry': {
@@ -195,7 +365,6 @@ class PlacesScraper:
                 'rating': place.get('rating'),
                 'user_ratings_total': place.get('userRatingCount'),
                 'business_status': place.get('businessStatus', '').upper(),
-                'price_level': place.get('priceLevel'),
                 'types': place.get('types', []),
                 'formatted_phone_number': place.get('nationalPhoneNumber', ''),
                 'international_phone_number': place.get('internationalPhoneNumber', ''),
@@ -211,46 +380,52 @@ class PlacesScraper:
     def get_place_details(self, place_id: str) -> Optional[Dict]:
         """Get detailed information for a specific place using new Places API."""
         try:
-            self._rate_limit()
-            
             # Use the new Places API Get Place endpoint
             url = f"https://places.googleapis.com/v1/places/{place_id}"
             
             headers = {
-                'X-Goog-Api-Key': self.api_key,
-                'X-Goog-FieldMask': 'id,displayName,formattedAddress,location,rating,userRatingCount,businessStatus,priceLevel,types,nationalPhoneNumber,internationalPhoneNumber,websiteUri,regularOpeningHours,photos'
+                'X-Goog-FieldMask': _DETAILS_FIELD_MASK
             }
             
-            import requests
-            response = requests.get(url, headers=headers)
+            response = self._request(self.session.get, url, headers=headers)
             
             if response.status_code == 200:
-                place_data = response.json()
+                place_data = _json_loads(response.content)
                 # Convert to legacy format for compatibility
                 return self._convert_new_api_format(place_data)
             else:
                 self.logger.error(f"Place details API request failed: {response.status_code} - {response.text}")
                 return None
             
+        except requests.RequestException as e:
+            # Retries are exhausted; let the caller decide what a failed lookup means
+            self.logger.error(f"Error getting place details for {place_id}: {e}")
+            raise
         except Exception as e:
             self.logger.error(f"Error getting place details for {place_id}: {e}")
             return None
     
-    def extract_business_data(self, place: Dict, detailed: bool = True) -> Dict:
-        """Extract and normalize business data from place information."""
-        # Get detailed info if requested
-        if detailed and 'place_id' in place:
-            place_details = self.get_place_details(place['place_id'])
-            if place_details:
-                place.update(place_details)
+    def extract_business_data(self, place: Dict, detailed: bool = True,
+                              query: str = '', location: str = '',
+                              scraped_at: str = None) -> BusinessRecord:
+        """Extract and normalize business data from place information.
+        
+        ``query`` and ``location`` describe the search that found the place and
+        are passed explicitly so one scraper can be shared across threads.
+        Batch callers pass one ``scraped_at`` timestamp for all their places.
+        """
+        # Get detailed info if requested and the search result is missing any of it
+        # (details carry every field, so read from them instead of merging into the caller's dict)
+        if detailed and _needs_details(place):
+            place = self.get_place_details(place['place_id']) or place
         
         # Extract coordinates
-        geometry = place.get('geometry', {}).get('location', {})
+        geometry = (place.get('geometry') or _EMPTY).get('location') or _EMPTY
         lat = geometry.get('lat')
         lng = geometry.get('lng')
         
         # Extract opening hours
-        opening_hours = place.get('opening_hours', {})
+        opening_hours = place.get('opening_hours') or _EMPTY
         hours_text = None
         if opening_hours:
             hours_text = '; '.join(opening_hours.get('weekday_text', []))
@@ -261,75 +436,139 @@ class PlacesScraper:
         
         # Extract email if available (often in website or additional data)
         email = None
-        if place.get('website'):
-            # Try to extract email from website domain
-            import re
-            website = place.get('website', '')
-            domain_match = re.search(r'https?://(?:www\.)?([^/]+)', website)
+        website = place.get('website')
+        if website:
+            # Guess the most common mailbox from the website domain
+            domain_match = _DOMAIN_RE.search(website)
             if domain_match:
-                domain = domain_match.group(1)
-                # Common email patterns
-                possible_emails = [
-                    f"info@{domain}",
-                    f"contact@{domain}",
-                    f"hello@{domain}",
-                    f"office@{domain}"
-                ]
-                # For now, use the most common one
-                email = f"info@{domain}"
+                email = f"info@{domain_match.group(1)}"
 
-        return {
-            'place_id': place.get('place_id'),
-            'name': place.get('name'),
-            'address': place.get('formatted_address') or place.get('vicinity'),
-            'phone': place.get('formatted_phone_number') or place.get('international_phone_number'),
-            'email': email,
-            'website': place.get('website'),
-            'rating': place.get('rating'),
-            'review_count': place.get('user_ratings_total'),
-            'business_status': place.get('business_status'),
-            'price_level': place.get('price_level'),
-            'primary_type': primary_type,
-            'all_types': ', '.join(types),
-            'latitude': lat,
-            'longitude': lng,
-            'opening_hours': hours_text,
-            'search_query': getattr(self, 'current_query', ''),
-            'search_location': getattr(self, 'current_location', ''),
-            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
-        }
+        return BusinessRecord(
+            place_id=place.get('place_id'),
+            name=place.get('name'),
+            address=place.get('formatted_address') or place.get('vicinity'),
+            phone=place.get('formatted_phone_number') or place.get('international_phone_number'),
+            email=email,
+            website=place.get('website'),
+            rating=place.get('rating'),
+            review_count=place.get('user_ratings_total'),
+            business_status=_intern(place.get('business_status')),
+            primary_type=_intern(primary_type),
+            all_types=_intern(', '.join(types)),
+            latitude=lat,
+            longitude=lng,
+            opening_hours=hours_text,
+            search_query=_intern(query),
+            search_location=_intern(location),
+            scraped_at=scraped_at or time.strftime('%Y-%m-%d %H:%M:%S')
+        )
     
-    def scrape_postal_codes(self, query_template: str, postal_codes: List[str], 
-                          detailed: bool = True) -> List[Dict]:
-        """Scrape multiple postal codes with a query template."""
-        all_results = []
+    def extract_businesses(self, places: List[Dict], detailed: bool = True,
+                           query: str = '', location: str = '') -> List[BusinessRecord]:
+        """Extract business data for several places, fetching details concurrently."""
+        scraped_at = time.strftime('%Y-%m-%d %H:%M:%S')
         
-        for i, postal_code in enumerate(postal_codes, 1):
-            self.logger.info(f"Processing postal code {i}/{len(postal_codes)}: {postal_code}")
-            
-            # Geocode postal code
-            coordinates = self.geocode_postal_code(postal_code)
-            if not coordinates:
-                continue
-            
-            # Format query
-            query = query_template.format(postal_code)
-            self.current_query = query
-            self.current_location = postal_code
-            
-            # Search places
-            places = self.search_places(query, coordinates)
+        def extract(place: Dict) -> Optional[BusinessRecord]:
+            try:
+                return self.extract_business_data(place, detailed, query, location, scraped_at)
+            except requests.RequestException:
+                # Details only top up the search result, so keep the lead without them
+                return self.extract_business_data(place, False, query, location, scraped_at)
+            except Exception as e:
+                self.logger.error(f"Error extracting data for place: {e}")
+                return None
+        
+        # Detail lookups are one round-trip each, so overlap them; _rate_limit paces the pool
+        if detailed and sum(map(_needs_details, places)) > 1:
+            with ThreadPoolExecutor(max_workers=min(config.DETAIL_WORKERS, len(places))) as executor:
+                results = list(executor.map(extract, places))
+        else:
+            results = [extract(place) for place in places]
+        
+        return [business for business in results if business]
+    
+    def _scrape_postal_code(self, query_template: str, postal_code: str, detailed: bool = True,
+                            claim: Callable[[str], bool] = None) -> List[BusinessRecord]:
+        """Geocode, search and extract businesses for one postal code.
+        
+        ``claim`` returns False for place_ids already taken by another postal code.
+        """
+        # Geocode postal code
+        coordinates = self.geocode_postal_code(postal_code)
+        if not coordinates:
+            return []
+        
+        # Format query
+        query = query_template.format(postal_code)
+        
+        # Search places and extract business data
+        places = self.search_places(query, coordinates)
+        if claim:
+            places = [place for place in places if claim(place.get('place_id'))]
+        businesses = self.extract_businesses(places, detailed, query, postal_code)
+        
+        self.logger.info(f"Extracted {len(businesses)} businesses from {postal_code}")
+        return businesses
+    
+    def iter_postal_codes(self, query_template: str, postal_codes: List[str],
+                          detailed: bool = True) -> Iterator[BusinessRecord]:
+        """Yield businesses for each postal code as soon as that code is done.
+        
+        Only a few postal codes are in flight at once, so memory stays bounded
+        and callers can write each business out while later codes are fetched.
+        Results come back in postal-code order.
+        """
+        total = 0
+        
+        # Chain stores show up in neighbouring postal codes; extract each place only once
+        seen_place_ids = set()
+        seen_lock = threading.Lock()
+        
+        def claim(place_id: str) -> bool:
+            if not place_id:
+                return True
+            with seen_lock:
+                if place_id in seen_place_ids:
+                    return False
+                seen_place_ids.add(place_id)
+                return True
+        
+        # Postal codes are independent network-bound jobs; keep a small window in flight
+        codes = iter(enumerate(postal_codes, 1))
+        in_flight = deque()
+        executor = ThreadPoolExecutor(max_workers=config.LOCATION_WORKERS)
+        
+        def submit_next():
+            item = next(codes, None)
+            if item:
+                i, postal_code = item
+                self.logger.info(f"Processing postal code {i}/{len(postal_codes)}: {postal_code}")
+                future = executor.submit(self._scrape_postal_code, query_template, postal_code, detailed, claim)
+                in_flight.append((postal_code, future))
+        
+        try:
+            for _ in range(config.LOCATION_WORKERS * 2):
+                submit_next()
             
-            # Extract business data
-            for place in places:
+            while in_flight:
+                postal_code, future = in_flight.popleft()
+                submit_next()
                 try:
-                    business_data = self.extract_business_data(place, detailed)
-                    all_results.append(business_data)
+                    businesses = future.result()
                 except Exception as e:
-                    self.logger.error(f"Error extracting data for place: {e}")
+                    self.logger.error(f"Error processing {postal_code}: {e}")
                     continue
-            
-            self.logger.info(f"Extracted {len(places)} businesses from {postal_code}")
+                
+                total += len(businesses)
+                yield from businesses
+        finally:
+            # If the caller stops early, drop queued codes rather than waiting for them;
+            # codes already running finish in the background and are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        self.logger.info(f"Total businesses extracted: {len(all_results)}")
-        return all_results 
\ No newline at end of file
+        self.logger.info(f"Total businesses extracted: {total}")
+    
+    def scrape_postal_codes(self, query_template: str, postal_codes: List[str], 
+                          detailed: bool = True) -> List[BusinessRecord]:
+        """Scrape multiple postal codes with a query template."""
+        return list(self.iter_postal_codes(query_template, postal_codes, detailed))
@@ -6,14 +6,15 @@ A user-friendly web app for extracting business leads
 
 import streamlit as st
 import pandas as pd
-import time
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import io
 import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-from places_scraper import PlacesScraper
-from data_handler import DataHandler
-from utils import generate_postal_codes, validate_query_template, detect_postal_code_type, geocode_area_name
+from utils import generate_postal_codes, validate_query_template, detect_postal_code_type, geocode_area_names
 import config
 
 # Page configuration
@@ -24,8 +25,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling; sent together with the header in main()
+# (Streamlit drops any element a rerun does not re-emit, so it cannot be skipped)
+PAGE_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -64,7 +66,7 @@ st.markdown("""
         color: #721c24;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # Initialize session state
 if 'scraping_results' not in st.session_state:
@@ -79,8 +81,8 @@ if 'results_queue' not in st.session_state:
 def main():
     """Main Streamlit application."""
     
-    # Header
-    st.markdown("""
+    # Header (one markdown element carries the page CSS and the banner)
+    st.markdown(PAGE_CSS + """
     <div class="main-header">
         <h1>🎯 Google Places Lead Scraper</h1>
         <p>Extract high-quality business leads using Google Places API</p>
@@ -216,7 +218,7 @@ def main():
                 return
             
             if search_type == "postal_code":
-                postal_type = detect_postal_code_type(start_postal)
+                postal_type = detect_postal_code_type(start_postal)  # lru_cached in utils
                 if postal_type:
                     st.success(f"✅ Detected {postal_type.upper()} postal code format")
                 else:
@@ -280,8 +282,8 @@ def main():
     
     with col2:
         st.header("📈 Quick Stats")
-        if st.session_state.get('all_results'):
-            df = pd.DataFrame(st.session_state.all_results)
+        df = st.session_state.get('results_df')
+        if df is not None and len(df):
             st.metric("Total Leads", len(df))
             if 'phone' in df.columns:
                 with_phone = df['phone'].notna().sum()
@@ -303,56 +305,83 @@ def main():
         )
     
     if stop_scraping:
+        st.session_state.cancel_event.set()
         st.session_state.scraping_in_progress = False
         st.warning("⏹️ Scraping stopped by user")
     
     if clear_results:
         st.session_state.scraping_results = []
-        if 'all_results' in st.session_state:
-            del st.session_state.all_results
+        if 'results_df' in st.session_state:
+            del st.session_state.results_df
+            del st.session_state.results_view
+            st.session_state.data_version = st.session_state.get('data_version', 0) + 1
+        st.session_state.pop('seen_place_ids', None)
+        st.session_state.pop('run_notice', None)
         if 'current_data' in st.session_state:
             del st.session_state.current_data
         st.success("🗑️ Results cleared")
         st.rerun()
 
+def _clear_queue(q):
+    """Discard everything in a queue under a single lock acquisition."""
+    with q.mutex:
+        q.queue.clear()
+        q.unfinished_tasks = 0
+        q.all_tasks_done.notify_all()
+        q.not_full.notify_all()
+
 def start_scraping_process(query_template, location_input, search_type, count, api_key, 
                          use_parallel, max_workers, detailed_data, output_dir):
     """Start the scraping process in a separate thread."""
     
+    # Never run two workers at once (e.g. a stopped run still finishing its locations)
+    running = st.session_state.get('scrape_thread')
+    if running is not None and running.is_alive():
+        st.warning("⏳ The previous scrape is still winding down; try again in a moment.")
+        return
+    
     st.session_state.scraping_in_progress = True
     st.session_state.scraping_results = []
+    st.session_state.pop('run_notice', None)
     
     # Clear queues
-    while not st.session_state.progress_queue.empty():
-        st.session_state.progress_queue.get()
-    while not st.session_state.results_queue.empty():
-        st.session_state.results_queue.get()
+    _clear_queue(st.session_state.progress_queue)
+    _clear_queue(st.session_state.results_queue)
     
-    # Start scraping thread with queue references
+    # Start scraping thread with queue references and a cancel token for Stop
+    st.session_state.cancel_event = threading.Event()
     thread = threading.Thread(
         target=scraping_worker,
         args=(query_template, location_input, search_type, count, api_key,
               use_parallel, max_workers, detailed_data, output_dir,
-              st.session_state.progress_queue, st.session_state.results_queue)
+              st.session_state.progress_queue, st.session_state.results_queue,
+              st.session_state.cancel_event)
     )
     thread.daemon = True
     thread.start()
+    st.session_state.scrape_thread = thread
     
     st.success("🚀 Scraping started! Check progress below.")
     st.rerun()
 
 def scraping_worker(query_template, location_input, search_type, count, api_key,
                    use_parallel, max_workers, detailed_data, output_dir,
-                   progress_queue, results_queue):
-    """Worker function for scraping in background thread."""
+                   progress_queue, results_queue, cancel_event):
+    """Worker function for scraping in background thread.
+    
+    ``cancel_event`` is set by the Stop button; locations not yet started are skipped.
+    """
     
-    # Store a reference to check scraping status
-    scraping_active = True
+    # Imported here so plain UI reruns never load the scraping stack
+    from places_scraper import PlacesScraper
+    from data_handler import DataHandler
     
+    scraper = None
+    geocode_pool = None
     try:
         # Initialize scraper
-        scraper = PlacesScraper(api_key)
         data_handler = DataHandler(output_dir)
+        scraper = PlacesScraper(api_key, data_handler.output_dir / config.GEOCODE_CACHE_FILENAME)
         
         # Generate locations based on search type
         if search_type == "postal_code":
@@ -368,75 +397,124 @@ def scraping_worker(query_template, location_input, search_type, count, api_key,
                 'message': f'Searching {len(locations)} areas'
             })
         
-        # Process locations
-        all_results = []
-        
-        for i, location in enumerate(locations):
-            # Check if we should continue (simplified check)
-            try:
-                import streamlit as st_check
-                if hasattr(st_check, 'session_state') and hasattr(st_check.session_state, 'scraping_in_progress'):
-                    if not st_check.session_state.scraping_in_progress:
-                        break
-            except:
-                pass  # Continue if we can't check session state
+        # Geocode every location up front in the background so lookups overlap
+        # with the Places searches below instead of running one at a time
+        # (repeat lookups are served by the scraper's persistent geocode cache)
+        if search_type == "postal_code":
+            geocode_pool = ThreadPoolExecutor(max_workers=config.LOCATION_WORKERS)
+            geocode_futures = [geocode_pool.submit(scraper.geocode_postal_code, location)
+                               for location in locations]
+            get_coordinates = lambda i: geocode_futures[i].result()
+        else:
+            # geocode_area_names dedupes the names and fans the lookups out itself
+            geocode_pool = ThreadPoolExecutor(max_workers=1)
+            areas_future = geocode_pool.submit(geocode_area_names, locations, api_key, scraper.geocode_cache)
+            get_coordinates = lambda i: areas_future.result()[i]
+        
+        # Split the template once; anything beyond a single plain {} keeps str.format
+        prefix, _, suffix = query_template.partition('{}')
+        if any(brace in prefix + suffix for brace in '{}'):
+            format_query = query_template.format
+        else:
+            format_query = lambda location: prefix + location + suffix
+        
+        # place_ids already taken by an earlier location in this run
+        seen_place_ids = set()
+        seen_lock = threading.Lock()
+        
+        def claim(place_id):
+            # Caller holds seen_lock
+            if not place_id:
+                return True
+            if place_id in seen_place_ids:
+                return False
+            seen_place_ids.add(place_id)
+            return True
+        
+        def process_location(i, location):
+            """Search one location and stream its rows; returns its progress update."""
+            if cancel_event.is_set():
+                return None
             
-            progress_queue.put({
+            # Collect this location's outcome and send it as one progress message
+            update = {
                 'type': 'progress',
-                'current': i + 1,
                 'total': len(locations),
-                'location': location
-            })
+                'location': location,
+                'status': 'success',
+                'messages': [],
+                'count': 0
+            }
             
             try:
-                # Get coordinates based on search type
-                if search_type == "postal_code":
-                    coordinates = scraper.geocode_postal_code(location)
-                else:  # area_name
-                    # For area names, get coordinates by geocoding the area name
-                    coordinates = geocode_area_name(location, api_key)
+                # Get coordinates based on search type (prefetched above)
+                coordinates = get_coordinates(i)
                 
                 if not coordinates:
-                    progress_queue.put({
-                        'type': 'warning',
-                        'message': f'Could not geocode {location}'
-                    })
-                    continue
+                    update['status'] = 'warning'
+                    update['messages'].append(f'Could not geocode {location}')
+                    return update
                 
                 # Format query and search
-                query = query_template.format(location)
-                scraper.current_query = query
-                scraper.current_location = location
+                query = format_query(location)
                 
                 # Use enhanced search for area names (large cities)
                 is_large_city = (search_type == "area_name")
                 places = scraper.search_places(query, coordinates, is_large_city=is_large_city)
                 
-                # Extract business data (simplified)
-                for place in places:
-                    try:
-                        business_data = scraper.extract_business_data(place, detailed_data)
-                        all_results.append(business_data)
-                    except Exception as e:
-                        continue
+                # Skip places another location already found, then extract the rest in one call
+                # (extract_businesses logs and drops individual failures)
+                with seen_lock:
+                    new_places = [place for place in places if claim(place.get('place_id'))]
+                location_results = scraper.extract_businesses(new_places, detailed_data, query, location)
+                
+                failed = len(new_places) - len(location_results)
+                if failed:
+                    update['messages'].append(f'{failed} places in {location} could not be extracted')
+                
+                # Hand each location's rows to the UI as a ready-made, typed frame
+                if location_results:
+                    batch_df = pd.DataFrame(location_results)
+                    batch_df['rating'] = pd.to_numeric(batch_df['rating'], errors='coerce')
+                    results_queue.put({
+                        'type': 'batch',
+                        'df': batch_df
+                    })
+                    update['count'] = len(location_results)
                 
-                progress_queue.put({
-                    'type': 'success',
-                    'message': f'Found {len(places)} businesses in {location}'
-                })
+                update['messages'].append(f'Found {len(places)} businesses in {location}')
             
             except Exception as e:
-                progress_queue.put({
-                    'type': 'error',
-                    'message': f'Error processing {location}: {str(e)}'
-                })
-                continue
+                update['status'] = 'error'
+                update['messages'].append(f'Error processing {location}: {str(e)}')
+            
+            return update
+        
+        # Process locations; the sidebar's worker count only applies in parallel mode
+        total_count = 0
+        
+        with ThreadPoolExecutor(max_workers=max_workers if use_parallel else 1) as executor:
+            futures = [executor.submit(process_location, i, location)
+                       for i, location in enumerate(locations)]
+            
+            for current, future in enumerate(as_completed(futures), 1):
+                update = future.result()
+                if update is None:
+                    continue
+                
+                update['current'] = current
+                total_count += update['count']
+                progress_queue.put(update)
+                
+                if cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
         
-        # Send results directly without complex processing
+        # Rows were already sent per location; just report the total
         results_queue.put({
             'type': 'completed',
-            'results': all_results,
-            'total_count': len(all_results)
+            'total_count': total_count
         })
         
     except Exception as e:
@@ -446,6 +524,12 @@ def scraping_worker(query_template, location_input, search_type, count, api_key,
         })
     
     finally:
+        # Release the geocoding threads and HTTP/cache handles even if the run failed
+        if geocode_pool is not None:
+            geocode_pool.shutdown(cancel_futures=True)
+        if scraper is not None:
+            scraper.close()
+        
         # Ensure scraping is marked as complete
         try:
             progress_queue.put({
@@ -455,6 +539,21 @@ def scraping_worker(query_template, location_input, search_type, count, api_key,
         except:
             pass
 
+# Columns shown in the results table (rating last) and their Arrow-backed dtypes
+DISPLAY_COLUMNS = ['name', 'address', 'phone', 'email', 'website', 'rating']
+DISPLAY_DTYPES = {col: pd.ArrowDtype(pa.string()) for col in DISPLAY_COLUMNS[:-1]}
+DISPLAY_DTYPES['rating'] = pd.ArrowDtype(pa.float64())
+
+def convert_df(df):
+    """CSV bytes for the download button, written by Arrow's C++ CSV writer."""
+    buffer = io.BytesIO()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(df, preserve_index=False),
+        buffer,
+        write_options=pa_csv.WriteOptions(quoting_style='needed')
+    )
+    return buffer.getvalue()
+
 def display_results():
     """Display scraping results immediately and seamlessly."""
     
@@ -465,125 +564,126 @@ def display_results():
         while not st.session_state.results_queue.empty():
             result = st.session_state.results_queue.get_nowait()
             
-            if result['type'] == 'completed':
-                # Mark scraping as complete
-                st.session_state.scraping_in_progress = False
-                
-                # Get results directly - no complex processing
-                results = result['results']
-                total_count = result['total_count']
+            if result['type'] == 'batch':
+                # Drop places already shown from an earlier run
+                new_df = result['df']
+                seen = st.session_state.setdefault('seen_place_ids', set())
+                new_df = new_df[~new_df['place_id'].isin(seen)]
+                seen.update(new_df['place_id'].dropna())
+                if new_df.empty:
+                    continue
                 
-                # Show completion message
-                st.success(f"✅ Found {total_count} businesses!")
+                # Append only the new rows, plus their blank-filled display view
+                # (Arrow-backed, so st.dataframe can hand the buffers over without re-inferring)
+                new_view = new_df[DISPLAY_COLUMNS].astype(DISPLAY_DTYPES)
+                text_cols = DISPLAY_COLUMNS[:-1]
+                new_view[text_cols] = new_view[text_cols].fillna('')
                 
-                # Simple append - no expensive operations
-                if results:
-                    # Just extend the list - fastest operation
-                    if 'all_results' not in st.session_state:
-                        st.session_state.all_results = []
-                    st.session_state.all_results.extend(results)
-                    
-                    # Create DataFrame only when needed
-                    df = pd.DataFrame(st.session_state.all_results)
-                    
-                    # Fix only rating column quickly
-                    if 'rating' in df.columns:
-                        df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
-                    
-                    # Display table immediately
-                    st.subheader("📊 Business Leads")
-                    display_cols = ['name', 'address', 'phone', 'email', 'website', 'rating']
-                    available_cols = [col for col in display_cols if col in df.columns]
-                    st.dataframe(
-                        df[available_cols].fillna(''),
-                        use_container_width=True,
-                        height=400
-                    )
-                    
-                    # Download button - CSV generated only when clicked
-                    @st.cache_data
-                    def convert_df(df):
-                        return df.to_csv(index=False)
-                    
-                    csv_data = convert_df(df)
-                    st.download_button(
-                        label="📄 Download CSV",
-                        data=csv_data,
-                        file_name=f"leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv",
-                        key="download_results"
+                results_df = st.session_state.get('results_df')
+                if results_df is None:
+                    st.session_state.results_df = new_df
+                    st.session_state.results_view = new_view
+                else:
+                    st.session_state.results_df = pd.concat([results_df, new_df], ignore_index=True)
+                    st.session_state.results_view = pd.concat(
+                        [st.session_state.results_view, new_view], ignore_index=True
                     )
+                st.session_state.data_version = st.session_state.get('data_version', 0) + 1
+            
+            elif result['type'] == 'completed':
+                # Mark scraping as complete
+                st.session_state.scraping_in_progress = False
+                
+                # Kept in session_state so the message survives the rerun that follows
+                if result['total_count']:
+                    st.session_state.run_notice = ('success', f"✅ Found {result['total_count']} businesses!")
                 else:
-                    st.warning("No businesses found.")
+                    st.session_state.run_notice = ('warning', "No businesses found.")
             
             elif result['type'] == 'error':
-                st.error(f"❌ {result['message']}")
+                st.session_state.run_notice = ('error', f"❌ {result['message']}")
                 st.session_state.scraping_in_progress = False
     
     except queue.Empty:
         pass
     
-    # Show existing data if available
-    if not st.session_state.get('scraping_in_progress', False) and 'all_results' in st.session_state and st.session_state.all_results:
-        df = pd.DataFrame(st.session_state.all_results)
-        
-        # Fix data types
-        if 'rating' in df.columns:
-            df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
-        
+    # Outcome of the last run, until the next run starts or results are cleared
+    notice = st.session_state.get('run_notice')
+    if notice:
+        level, message = notice
+        getattr(st, level)(message)
+    
+    # Show collected data, growing live while scraping
+    df = st.session_state.get('results_df')
+    if df is not None and len(df):
         st.subheader("📊 Business Leads")
-        display_cols = ['name', 'address', 'phone', 'email', 'website', 'rating']
-        available_cols = [col for col in display_cols if col in df.columns]
         st.dataframe(
-            df[available_cols].fillna(''),
+            st.session_state.results_view,
             use_container_width=True,
             height=400
         )
         
-        # Cached download button
-        @st.cache_data
-        def convert_df(df):
-            return df.to_csv(index=False)
-        
-        csv_data = convert_df(df)
-        st.download_button(
-            label="📄 Download CSV",
-            data=csv_data,
-            file_name=f"leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            key="download_existing"
-        )
+        # Download button, once the run has finished; the CSV is rebuilt only
+        # when new rows have arrived (keyed on a counter, not a hash of the frame)
+        if not st.session_state.get('scraping_in_progress', False):
+            data_version = st.session_state.get('data_version', 0)
+            if st.session_state.get('csv_version') != data_version:
+                st.session_state.csv_data = convert_df(df)
+                st.session_state.csv_version = data_version
+            csv_data = st.session_state.csv_data
+            st.download_button(
+                label="📄 Download CSV",
+                data=csv_data,
+                file_name=f"leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                key="download_results"
+            )
     elif not st.session_state.get('scraping_in_progress', False):
         st.info("💡 No data available yet. Start scraping to see results here!")
 
+# Only the live section refreshes while a scrape runs, not the whole script
+# run_every is fixed when the fragment is registered on a full run, so remember
+# whether this registration polls; the fragment ends its own polling below
+st.session_state.results_polling = st.session_state.get('scraping_in_progress', False)
 
-
-# Simple progress monitoring
-if st.session_state.get('scraping_in_progress', False):
-    try:
-        # Check for progress updates
-        while not st.session_state.progress_queue.empty():
-            progress_update = st.session_state.progress_queue.get_nowait()
-            
-            if progress_update['type'] == 'progress':
-                current = progress_update['current']
-                total = progress_update['total'] 
-                location = progress_update['location']
-                st.text(f"Processing {current}/{total}: {location}")
-            
-            elif progress_update['type'] == 'complete_status':
-                st.session_state.scraping_in_progress = False
-                st.rerun()
+@st.fragment(run_every=1.0 if st.session_state.results_polling else None)
+def live_results():
+    """Show worker progress and results, refreshing every second while scraping."""
+    # Simple progress monitoring
+    if st.session_state.get('scraping_in_progress', False):
+        try:
+            # Check for progress updates
+            while not st.session_state.progress_queue.empty():
+                progress_update = st.session_state.progress_queue.get_nowait()
+                
+                if progress_update['type'] == 'progress':
+                    current = progress_update['current']
+                    total = progress_update['total'] 
+                    location = progress_update['location']
+                    st.text(f"Processing {current}/{total}: {location}")
+                    
+                    # Surface problems; routine "found N" notes stay out of the way
+                    for message in progress_update.get('messages', []):
+                        if progress_update['status'] == 'error':
+                            st.error(message)
+                        elif progress_update['status'] == 'warning':
+                            st.warning(message)
+                
+                elif progress_update['type'] == 'complete_status':
+                    st.session_state.scraping_in_progress = False
+        
+        except queue.Empty:
+            pass
     
-    except queue.Empty:
-        pass
+    display_results()
     
-    # Auto-refresh while scraping
-    time.sleep(1)
-    st.rerun()
+    # Once the run finishes or is stopped, rerun the full app once: the controls and
+    # stats reflect the final state and the fragment re-registers without a timer
+    if st.session_state.results_polling and not st.session_state.get('scraping_in_progress', False):
+        st.rerun()
 
 # Always display results section
-display_results()
+live_results()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from data_handler import DataHandler
+
+@pytest.fixture
+def handler(tmp_path):
+    return DataHandler(tmp_path)
+
+def test_business_keys_ignore_punctuation_suffixes_and_case(handler):
+    df = pd.DataFrame([
+        {'name': "Joe's Dental Inc.", 'address': '12 Main St.,  Waterloo', 'phone': '(519) 555-0100'},
+        {'name': 'JOES DENTAL', 'address': '12 main st waterloo', 'phone': '519.555.0100'},
+    ])
+    first, second = handler._business_keys(df)
+    assert first == second == ('joes dental', '12 main st waterloo', '5195550100')
+
+def test_business_keys_fill_missing_columns(handler):
+    keys = handler._business_keys(pd.DataFrame([{'name': 'Acme Corp', 'phone': None}]))
+    assert keys == [('acme', '', '')]
+
+def test_deduplicate_drops_fuzzy_and_place_id_duplicates(handler):
+    businesses = [
+        {'place_id': 'a', 'name': "Joe's Dental", 'address': '12 Main St', 'phone': '519-555-0100'},
+        {'place_id': 'b', 'name': 'Joes Dental Ltd', 'address': '12 main st', 'phone': '(519) 555 0100'},
+        {'place_id': 'a', 'name': 'Other Name', 'address': '1 Elm St', 'phone': ''},
+        {'place_id': 'c', 'name': 'Smile Clinic', 'address': '9 King St', 'phone': ''},
+    ]
+    unique = handler.deduplicate_businesses(businesses)
+    assert [b['place_id'] for b in unique] == ['a', 'c']
+    
+    # Later batches are checked against what was already accepted
+    assert handler.deduplicate_businesses([{'place_id': 'd', 'name': 'SMILE CLINIC', 'address': '9 King St.'}]) == []
+
+def test_released_place_ids_can_be_reserved_again(handler):
+    assert handler.reserve_place_id('a')
+    assert not handler.reserve_place_id('a')
+    handler.release_place_ids({'a'})
+    assert handler.reserve_place_id('a')
+
+def test_finalize_skips_rebuild_when_nothing_new(tmp_path, monkeypatch):
+    first = DataHandler(tmp_path)
+    first.save_businesses([{'place_id': 'a', 'name': 'Smile Clinic', 'address': '9 King St'}])
+    first.finalize()
+    first.close()
+    
+    resumed = DataHandler(tmp_path)
+    rebuilds = []
+    monkeypatch.setattr(resumed, 'save_to_xlsx', lambda *args: rebuilds.append(args))
+    resumed.finalize()
+    assert rebuilds == []
+    
+    resumed.save_businesses([{'place_id': 'b', 'name': 'Bright Dental', 'address': '1 Elm St'}])
+    resumed.finalize()
+    assert rebuilds == [()]
@@ -0,0 +1,15 @@
+import places_scraper
+from places_scraper import _needs_details
+
+PLACE = {'place_id': 'abc', 'formatted_phone_number': '', 'website': '', 'opening_hours': {}}
+
+def test_needs_details_is_false_when_details_add_no_fields():
+    # Same mask for search and details: an empty phone/website stays empty
+    assert places_scraper._DETAILS_ONLY_FIELDS == ()
+    assert not _needs_details(PLACE)
+    assert not _needs_details(dict(PLACE, website='https://example.com'))
+
+def test_needs_details_when_details_request_extra_fields(monkeypatch):
+    monkeypatch.setattr(places_scraper, '_DETAILS_ONLY_FIELDS', ('priceLevel',))
+    assert _needs_details(PLACE)
+    assert not _needs_details(dict(PLACE, place_id=''))
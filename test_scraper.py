@@ -39,7 +39,7 @@ def test_basic_functionality():
         if places:
             # Test data extraction
             business_data = scraper.extract_business_data(places[0], detailed=False)
-            print(f"✅ Extracted data for: {business_data.get('name', 'Unknown')}")
+            print(f"✅ Extracted data for: {business_data.name or 'Unknown'}")
             
             # Test data saving
             data_handler.save_businesses([business_data], continuous=False)
@@ -0,0 +1,89 @@
+import pytest
+
+from utils import (
+    _PATTERN_LIST,
+    PostalCodeGenerator,
+    clean_phone_number,
+    detect_postal_code_type,
+    extract_domain_from_website,
+    format_business_summary,
+    generate_postal_codes
+)
+
+@pytest.mark.parametrize('website, domain', [
+    ('https://www.Example.com/contact', 'example.com'),
+    ('http://example.com:8080/a/b', 'example.com'),
+    ('HTTPS://WWW.EXAMPLE.CA', 'example.ca'),
+    ('www.example.co.uk/path:with:colons', 'example.co.uk'),
+    ('example.org', 'example.org'),
+    ('https://shop.example.com', 'shop.example.com'),
+    ('', ''),
+    (None, ''),
+])
+def test_extract_domain_from_website(website, domain):
+    assert extract_domain_from_website(website) == domain
+
+@pytest.mark.parametrize('phone, cleaned', [
+    ('(519) 555-0100', '+15195550100'),
+    ('1-519-555-0100', '+15195550100'),
+    ('+44 20 7946 0958', '+442079460958'),
+    ('+1 (519) 555+0100', '+15195550100'),
+    ('519\u00a0555\u20130100', '+15195550100'),
+    ('555-0100', '5550100'),
+    ('', ''),
+    (None, ''),
+])
+def test_clean_phone_number(phone, cleaned):
+    assert clean_phone_number(phone) == cleaned
+
+@pytest.mark.parametrize('postal_code, region', [
+    ('N2J 4Z2', 'canada'),
+    ('n2j4z2', 'canada'),
+    ('  K1A 0B1 ', 'canada'),
+    ('90210', 'usa'),
+    ('90210-1234', 'usa'),
+    ('SW1A 1AA', 'uk'),
+    ('M1 1AE', 'uk'),
+    ('sw1a 1aa', None),
+    ('1234', None),
+    ('', None),
+    ('#N2J 4Z2', None),
+])
+def test_detect_postal_code_type(postal_code, region):
+    assert detect_postal_code_type(postal_code) == region
+
+@pytest.mark.parametrize('postal_code', ['N2J 4Z2', 'n2j4z2', '90210', '90210-1234', 'SW1A 1AA', 'M1 1AE', 'A', '9'])
+def test_postal_dispatch_matches_full_scan(postal_code):
+    # The first-character dispatch must agree with trying every configured pattern
+    full_scan = next((region for region, pattern in _PATTERN_LIST if pattern.match(postal_code)), None)
+    assert detect_postal_code_type(postal_code) == full_scan
+
+@pytest.mark.parametrize('generate', [
+    PostalCodeGenerator.canadian_postal_codes,
+    PostalCodeGenerator.uk_postal_codes,
+])
+def test_random_postal_generators_are_seedable(generate):
+    start = 'N2J 4Z2' if generate is PostalCodeGenerator.canadian_postal_codes else 'SW1A 1AA'
+    codes = generate(start, 30, seed=7)
+    assert len(codes) == 30
+    assert codes == generate(start, 30, seed=7)
+    assert all(detect_postal_code_type(code) for code in codes)
+
+@pytest.mark.parametrize('start', ['N2J 4Z2', '10001', 'SW1A 1AA'])
+@pytest.mark.parametrize('count', [0, -1])
+def test_generators_return_nothing_for_non_positive_count(start, count):
+    assert generate_postal_codes(start, count) == []
+
+def test_us_zip_codes_wrap_and_pad():
+    assert PostalCodeGenerator.us_zip_codes('99998', 3) == ['99998', '99999', '00000']
+
+def test_format_business_summary_accepts_records_and_dicts():
+    from places_scraper import BusinessRecord
+    
+    fields = dict.fromkeys(BusinessRecord._fields)
+    fields.update(name='Acme Dental', phone='+15195550100', rating=4.5, website='https://acme.ca')
+    expected = ("• Acme Dental\n  Address: No address\n  Phone: +15195550100\n"
+                "  Rating: 4.5\n  Website: https://acme.ca")
+    assert format_business_summary(BusinessRecord(**fields)) == expected
+    assert format_business_summary({k: v for k, v in fields.items() if v is not None}) == expected
+    assert format_business_summary({}).startswith("• Unknown")
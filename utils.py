@@ -1,40 +1,88 @@
+import logging
 import re
-import random
+import sqlite3
 import string
-from typing import List, Iterator, Optional
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from math import acos, cos, radians
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import config
 
+if TYPE_CHECKING:
+    from places_scraper import BusinessRecord
+
+logger = logging.getLogger(__name__)
+
+# Mean Earth radius in kilometers
+_EARTH_RADIUS_KM = 6371
+
+# Patterns compiled once at import instead of on every call
+_CA_POSTAL_RE = re.compile(r'([A-Z])(\d)([A-Z])\s?(\d)([A-Z])(\d)')  # matched against upper-cased input
+_UK_AREA_RE = re.compile(r'([A-Z]{1,2})')
+_NONDIGIT_RE = re.compile(r'[^\d+]')
+# Deletes every ASCII character except digits and '+'; the regex above handles non-ASCII leftovers
+_PHONE_TRANS = str.maketrans('', '', ''.join(chr(c) for c in range(128) if chr(c) not in '0123456789+'))
+# Uppercase alphabet for mapping batched random draws to letters
+_ALPHA = string.ascii_uppercase
+_LETTERS = np.array(list(_ALPHA))
+
+_PATTERN_LIST = [(region, re.compile(pattern)) for region, pattern in config.POSTAL_CODE_PATTERNS.items()]
+
+# Characters each known postal format can start with; regions not listed are tried for every input
+_FIRST_CHARS = {
+    'canada': string.ascii_letters,
+    'usa': string.digits,
+    'uk': string.ascii_uppercase
+}
+_UNDISPATCHED = [(region, pattern) for region, pattern in _PATTERN_LIST if region not in _FIRST_CHARS]
+
+# First character -> only the patterns that could match, in config order
+_PREFIX_DISPATCH = {
+    char: [(region, pattern) for region, pattern in _PATTERN_LIST
+           if char in _FIRST_CHARS.get(region, char)]
+    for char in string.ascii_letters + string.digits
+}
+
 class PostalCodeGenerator:
     """Generate postal codes for different regions."""
     
     @staticmethod
-    def canadian_postal_codes(start_code: str, count: int = 100) -> List[str]:
-        """Generate Canadian postal codes starting from a given code."""
-        codes = []
+    def canadian_postal_codes(start_code: str, count: int = 100, seed: Optional[int] = None) -> List[str]:
+        """Generate Canadian postal codes starting from a given code.
         
+        The unit portion is random; pass ``seed`` for a reproducible list.
+        """
         # Parse the starting postal code
-        match = re.match(r'([A-Za-z])(\d)([A-Za-z])\s?(\d)([A-Za-z])(\d)', start_code.upper())
+        match = _CA_POSTAL_RE.match(start_code.upper())
         if not match:
             raise ValueError(f"Invalid Canadian postal code format: {start_code}")
         
         area_code, district_num, district_letter, _, _, _ = match.groups()
         
-        # Generate variations
-        for i in range(count):
-            # Increment district number with wraparound
-            new_district_num = (int(district_num) + (i // 26)) % 10
-            
-            # Cycle through district letters
-            letter_offset = i % 26
-            new_district_letter = chr((ord(district_letter) - ord('A') + letter_offset) % 26 + ord('A'))
-            
-            # Random unit portion (last 3 characters)
-            unit_num = random.randint(1, 9)
-            unit_letter = random.choice(string.ascii_uppercase)
-            unit_final = random.randint(0, 9)
-            
-            postal_code = f"{area_code}{new_district_num}{new_district_letter} {unit_num}{unit_letter}{unit_final}"
-            codes.append(postal_code)
+        if count <= 0:
+            return []
+        
+        # Draw the random unit portions (last 3 characters) in one batch
+        rng = np.random.default_rng(seed)
+        unit_nums = rng.integers(1, 10, count).tolist()
+        unit_letters = _LETTERS[rng.integers(0, 26, count)].tolist()
+        unit_finals = rng.integers(0, 10, count).tolist()
+        
+        base_num = int(district_num)
+        base_letter = ord(district_letter) - ord('A')
+        
+        # Generate variations: district number wraps every 26 codes, district letter cycles
+        codes = [
+            f"{area_code}{(base_num + i // 26) % 10}{_ALPHA[(base_letter + i) % 26]} {unit_num}{unit_letter}{unit_final}"
+            for i, unit_num, unit_letter, unit_final in zip(range(count), unit_nums, unit_letters, unit_finals)
+        ]
         
         return codes
     
@@ -43,62 +91,64 @@ class PostalCodeGenerator:
         """Generate US ZIP codes starting from a given ZIP."""
         try:
             start_num = int(start_zip[:5])
-            codes = []
-            
-            for i in range(count):
-                new_zip = start_num + i
-                if new_zip > 99999:
-                    new_zip = new_zip % 100000
-                codes.append(f"{new_zip:05d}")
-            
-            return codes
         except ValueError:
             raise ValueError(f"Invalid US ZIP code format: {start_zip}")
+        
+        if count <= 0:
+            return []
+        
+        # Wrap past 99999 and zero-pad in one vectorized pass
+        zips = (np.arange(count) + start_num) % 100000
+        return np.char.zfill(zips.astype('U5'), 5).tolist()
     
     @staticmethod
-    def uk_postal_codes(start_code: str, count: int = 100) -> List[str]:
-        """Generate UK postal codes starting from a given code."""
+    def uk_postal_codes(start_code: str, count: int = 100, seed: Optional[int] = None) -> List[str]:
+        """Generate UK postal codes starting from a given code.
+        
+        District, sector and unit are random; pass ``seed`` for a reproducible list.
+        """
         # Simplified UK postal code generation
-        codes = []
         base_code = start_code.replace(' ', '').upper()
         
         # Extract area code (first 1-2 letters)
-        area_match = re.match(r'([A-Z]{1,2})', base_code)
+        area_match = _UK_AREA_RE.match(base_code)
         if not area_match:
             raise ValueError(f"Invalid UK postal code format: {start_code}")
         
         area = area_match.group(1)
         
-        for i in range(count):
-            district = random.randint(1, 99)
-            sector = random.randint(0, 9)
-            unit = ''.join(random.choices(string.ascii_uppercase, k=2))
-            
-            postal_code = f"{area}{district} {sector}{unit}"
-            codes.append(postal_code)
+        if count <= 0:
+            return []
         
-        return codes
+        # Draw districts, sectors and two-letter units in one batch
+        rng = np.random.default_rng(seed)
+        districts = rng.integers(1, 100, count).tolist()
+        sectors = rng.integers(0, 10, count).tolist()
+        units = np.char.add(*_LETTERS[rng.integers(0, 26, (2, count))]).tolist()
+        
+        return [f"{area}{district} {sector}{unit}" for district, sector, unit in zip(districts, sectors, units)]
 
+@lru_cache(maxsize=4096)
 def detect_postal_code_type(postal_code: str) -> Optional[str]:
     """Detect the type of postal code (Canada, US, UK)."""
     postal_code = postal_code.strip()
     
-    for region, pattern in config.POSTAL_CODE_PATTERNS.items():
-        if re.match(pattern, postal_code):
+    for region, pattern in _PREFIX_DISPATCH.get(postal_code[:1], _UNDISPATCHED):
+        if pattern.match(postal_code):
             return region
     
     return None
 
-def generate_postal_codes(start_code: str, count: int = 100) -> List[str]:
-    """Generate postal codes based on the detected type."""
+def generate_postal_codes(start_code: str, count: int = 100, seed: Optional[int] = None) -> List[str]:
+    """Generate postal codes based on the detected type (``seed`` fixes any random parts)."""
     region = detect_postal_code_type(start_code)
     
     if region == 'canada':
-        return PostalCodeGenerator.canadian_postal_codes(start_code, count)
+        return PostalCodeGenerator.canadian_postal_codes(start_code, count, seed)
     elif region == 'usa':
         return PostalCodeGenerator.us_zip_codes(start_code, count)
     elif region == 'uk':
-        return PostalCodeGenerator.uk_postal_codes(start_code, count)
+        return PostalCodeGenerator.uk_postal_codes(start_code, count, seed)
     else:
         raise ValueError(f"Unsupported postal code format: {start_code}")
 
@@ -112,7 +162,11 @@ def clean_phone_number(phone: str) -> str:
         return ""
     
     # Remove all non-digit characters except + at the beginning
-    cleaned = re.sub(r'[^\d+]', '', phone)
+    cleaned = phone.translate(_PHONE_TRANS)
+    if not cleaned.isascii():
+        cleaned = _NONDIGIT_RE.sub('', cleaned)
+    if '+' in cleaned[1:]:
+        cleaned = ('+' if cleaned.startswith('+') else '') + cleaned.replace('+', '')
     
     # Handle international format
     if cleaned.startswith('+'):
@@ -131,39 +185,35 @@ def extract_domain_from_website(website: str) -> str:
     if not website:
         return ""
     
+    domain = website.lower()
     # Remove protocol
-    domain = re.sub(r'^https?://', '', website)
+    if domain.startswith('https://'):
+        domain = domain[8:]
+    elif domain.startswith('http://'):
+        domain = domain[7:]
     # Remove www
-    domain = re.sub(r'^www\.', '', domain)
-    # Remove path
-    domain = domain.split('/')[0]
-    # Remove port
-    domain = domain.split(':')[0]
-    
-    return domain.lower()
-
-def batch_list(items: List, batch_size: int) -> Iterator[List]:
-    """Split a list into batches of specified size."""
-    for i in range(0, len(items), batch_size):
-        yield items[i:i + batch_size]
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    # Remove path, then port
+    return domain.partition('/')[0].partition(':')[0]
 
 def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     """Calculate distance between two coordinates using Haversine formula."""
-    import math
-    
     # Convert latitude and longitude from degrees to radians
-    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    lat1, lng1, lat2, lng2 = radians(lat1), radians(lng1), radians(lat2), radians(lng2)
     
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.asin(math.sqrt(a))
+    # Haversine in its cosine form: four cos and one acos, no sin/sqrt
+    central = cos(lat1 - lat2) - cos(lat1) * cos(lat2) * (1 - cos(lng1 - lng2))
     
-    # Radius of earth in kilometers
-    r = 6371
+    # Clamp rounding error so identical points don't fall outside acos' domain
+    return _EARTH_RADIUS_KM * acos(min(1.0, max(-1.0, central)))
+
+def calculate_distances(lats1, lngs1, lats2, lngs2) -> np.ndarray:
+    """Haversine distances in km between arrays of coordinates (broadcasts like NumPy)."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lats1, lngs1, lats2, lngs2))
     
-    return c * r
+    central = np.cos(lat1 - lat2) - np.cos(lat1) * np.cos(lat2) * (1 - np.cos(lng1 - lng2))
+    return _EARTH_RADIUS_KM * np.arccos(np.clip(central, -1.0, 1.0))
 
 class ProgressTracker:
     """Track and display progress of scraping operations."""
@@ -173,46 +223,153 @@ class ProgressTracker:
         self.completed_items = 0
         self.start_time = None
         self.current_item = ""
+        self._pct_per_item = 100.0 / total_items if total_items else 0.0
+        self._last_print = 0.0
     
     def start(self):
         """Start the progress tracker."""
-        import time
         self.start_time = time.time()
         print(f"Starting processing of {self.total_items} items...")
     
     def update(self, item_name: str = "", increment: int = 1):
-        """Update progress."""
-        import time
+        """Update progress, printing at most every PROGRESS_PRINT_INTERVAL seconds."""
         self.completed_items += increment
         self.current_item = item_name
         
-        if self.start_time:
-            elapsed = time.time() - self.start_time
-            if self.completed_items > 0:
-                rate = self.completed_items / elapsed
-                eta = (self.total_items - self.completed_items) / rate if rate > 0 else 0
-                
-                print(f"Progress: {self.completed_items}/{self.total_items} "
-                      f"({self.completed_items/self.total_items*100:.1f}%) "
-                      f"| Current: {item_name} "
-                      f"| Rate: {rate:.1f} items/sec "
-                      f"| ETA: {eta/60:.1f} min")
+        if not self.start_time or self.completed_items <= 0:
+            return
+        
+        # Skip formatting entirely unless a line is due (the last item always prints)
+        now = time.monotonic()
+        if now - self._last_print < config.PROGRESS_PRINT_INTERVAL and self.completed_items < self.total_items:
+            return
+        self._last_print = now
+        
+        elapsed = time.time() - self.start_time
+        rate = self.completed_items / elapsed if elapsed > 0 else 0
+        eta = (self.total_items - self.completed_items) / rate if rate > 0 else 0
+        
+        print(f"Progress: {self.completed_items}/{self.total_items} "
+              f"({self.completed_items * self._pct_per_item:.1f}%) "
+              f"| Current: {item_name} "
+              f"| Rate: {rate:.1f} items/sec "
+              f"| ETA: {eta/60:.1f} min")
     
     def finish(self):
         """Complete the progress tracking."""
-        import time
         if self.start_time:
             total_time = time.time() - self.start_time
             print(f"Completed {self.completed_items} items in {total_time/60:.1f} minutes")
 
-def geocode_area_name(area_name: str, api_key: str = None) -> Optional[tuple]:
-    """Geocode an area name to coordinates using multiple services."""
-    import requests
-    import time
-    import logging
+class GeocodeCache:
+    """Persistent location -> (lat, lng) cache backed by SQLite."""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self._memory: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocache "
+            "(location TEXT PRIMARY KEY, lat REAL, lng REAL, ts INTEGER)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def _key(location: str) -> str:
+        """Normalize case and whitespace so equivalent inputs share an entry."""
+        return ' '.join(location.upper().split())
     
-    logger = logging.getLogger(__name__)
+    def get(self, location: str) -> Optional[Tuple[float, float]]:
+        """Return cached coordinates, or None on a miss."""
+        key = self._key(location)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            
+            row = self._conn.execute(
+                "SELECT lat, lng FROM geocache WHERE location = ?", (key,)
+            ).fetchone()
+            if row:
+                self._memory[key] = (row[0], row[1])
+                return self._memory[key]
+        return None
+    
+    def set(self, location: str, coordinates: Tuple[float, float]):
+        """Store coordinates in memory and on disk."""
+        key = self._key(location)
+        lat, lng = coordinates
+        with self._lock:
+            self._memory[key] = (lat, lng)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocache (location, lat, lng, ts) VALUES (?, ?, ?, ?)",
+                (key, lat, lng, int(time.time()))
+            )
+            self._conn.commit()
     
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+# Keeps area names apart from postal codes when they share a GeocodeCache
+_AREA_KEY_PREFIX = 'AREA:'
+
+# Shared keep-alive session for area-name geocoding (Nominatim requires a User-Agent)
+_SESSION = requests.Session()
+_SESSION.headers.update({'User-Agent': 'Lead-Scraper/1.0 (Business Lead Generation Tool)'})
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.5)
+))
+
+# Serializes every Nominatim call in the process (postal codes and area names)
+# to one per NOMINATIM_MIN_INTERVAL, however many threads are geocoding
+_nominatim_lock = threading.Lock()
+_nominatim_last = 0.0
+
+def wait_for_nominatim():
+    """Block until the next Nominatim request is allowed."""
+    global _nominatim_last
+    
+    with _nominatim_lock:
+        wait = _nominatim_last + config.NOMINATIM_MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _nominatim_last = time.monotonic()
+
+def geocode_area_name(area_name: str, api_key: str = None,
+                      cache: Optional[GeocodeCache] = None) -> Optional[tuple]:
+    """Geocode an area name to coordinates, memoized for the life of the process.
+    
+    With a GeocodeCache, successful lookups are also persisted so later runs
+    skip the network entirely.
+    """
+    if cache is not None:
+        coordinates = cache.get(_AREA_KEY_PREFIX + area_name)
+        if coordinates:
+            return coordinates
+    
+    try:
+        coordinates = _geocode_area_name_cached(area_name, api_key)
+    except LookupError:
+        return None
+    
+    if cache is not None:
+        cache.set(_AREA_KEY_PREFIX + area_name, coordinates)
+    return coordinates
+
+@lru_cache(maxsize=4096)
+def _geocode_area_name_cached(area_name: str, api_key: Optional[str]) -> tuple:
+    """Cached lookup; raises LookupError on failure so misses are retried."""
+    coordinates = _lookup_area_name(area_name, api_key)
+    if coordinates is None:
+        raise LookupError(area_name)
+    return coordinates
+
+def _lookup_area_name(area_name: str, api_key: Optional[str]) -> Optional[tuple]:
+    """Geocode an area name to coordinates using multiple services."""
     # Try Google Geocoding API first (more reliable for area names)
     if api_key:
         try:
@@ -221,7 +378,7 @@ def geocode_area_name(area_name: str, api_key: str = None) -> Optional[tuple]:
                 'address': area_name,
                 'key': api_key
             }
-            response = requests.get(geocode_url, params=params, timeout=10)
+            response = _SESSION.get(geocode_url, params=params, timeout=10)
             data = response.json()
             
             if data.get('status') == 'OK' and data.get('results'):
@@ -236,9 +393,6 @@ def geocode_area_name(area_name: str, api_key: str = None) -> Optional[tuple]:
     # Fallback to Nominatim (OpenStreetMap) - free but requires proper headers
     try:
         geocode_url = "https://nominatim.openstreetmap.org/search"
-        headers = {
-            'User-Agent': 'Lead-Scraper/1.0 (Business Lead Generation Tool)'
-        }
         params = {
             'q': area_name,
             'format': 'json',
@@ -247,10 +401,10 @@ def geocode_area_name(area_name: str, api_key: str = None) -> Optional[tuple]:
             'countrycodes': 'ca,us,gb'  # Limit to common countries
         }
         
-        # Add delay to respect rate limits
-        time.sleep(1)
+        # Respect Nominatim's rate limit across all threads
+        wait_for_nominatim()
         
-        response = requests.get(geocode_url, params=params, headers=headers, timeout=10)
+        response = _SESSION.get(geocode_url, params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -269,19 +423,44 @@ def geocode_area_name(area_name: str, api_key: str = None) -> Optional[tuple]:
     logger.error(f"Failed to geocode {area_name} with all methods")
     return None
 
-def format_business_summary(business: dict) -> str:
-    """Format a business record into a readable summary."""
-    name = business.get('name', 'Unknown')
-    address = business.get('address', 'No address')
-    phone = business.get('phone', 'No phone')
-    rating = business.get('rating', 'No rating')
-    
-    summary = f"• {name}\n"
-    summary += f"  Address: {address}\n"
-    summary += f"  Phone: {phone}\n"
-    summary += f"  Rating: {rating}"
-    
-    if business.get('website'):
-        summary += f"\n  Website: {business['website']}"
-    
-    return summary 
\ No newline at end of file
+def geocode_area_names(area_names: List[str], api_key: str = None,
+                       cache: Optional[GeocodeCache] = None) -> List[Optional[tuple]]:
+    """Geocode several area names concurrently, preserving input order.
+    
+    Duplicate names are looked up once, and names already in the cache are
+    answered without touching the thread pool.
+    """
+    results: Dict[str, Optional[tuple]] = {}
+    pending = []
+    for name in dict.fromkeys(area_names):
+        cached = cache.get(_AREA_KEY_PREFIX + name) if cache is not None else None
+        if cached:
+            results[name] = cached
+        else:
+            pending.append(name)
+    
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(config.GEOCODE_WORKERS, len(pending))) as executor:
+            results.update(zip(pending, executor.map(lambda name: geocode_area_name(name, api_key, cache), pending)))
+    
+    return [results[name] for name in area_names]
+
+def format_business_summary(business: Union['BusinessRecord', Dict]) -> str:
+    """Format a business record (a BusinessRecord or a plain dict) into a readable summary."""
+    if isinstance(business, dict):
+        field = business.get
+    else:
+        field = lambda name: getattr(business, name, None)
+    
+    parts = [
+        f"• {field('name') or 'Unknown'}",
+        f"  Address: {field('address') or 'No address'}",
+        f"  Phone: {field('phone') or 'No phone'}",
+        f"  Rating: {field('rating') or 'No rating'}"
+    ]
+    
+    website = field('website')
+    if website:
+        parts.append(f"  Website: {website}")
+    
+    return '\n'.join(parts)